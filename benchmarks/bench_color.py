@@ -0,0 +1,61 @@
+"""
+bench_color.py
+
+Compare the throughput, in lines per second, of writing colored log lines
+through ColorCM and printit, as the example loggers used to, and through a
+precompiled ColorRenderer. stdout is replaced with a stream which discards what
+is written, so that only the cost of rendering is measured.
+
+usage: python -m benchmarks.bench_color [lines]
+"""
+import sys
+import timeit
+
+from example.color_util import ColorCM, ColorRenderer, printit
+
+
+class NullStream(object):
+    """stream which discards writes"""
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+def color_cm_line():
+    """a line written through ColorCM"""
+    with ColorCM(printit, "green") as colorm:
+        colorm("INFO  | benchmarks.bench_color |", "message")
+
+
+RENDERER = ColorRenderer("green", use_colors=True)
+
+def renderer_line():
+    """a line written through a ColorRenderer"""
+    RENDERER("INFO  | benchmarks.bench_color |", "message")
+
+
+def measure(lines=100000):
+    """
+    return the best (ColorCM lines/s, ColorRenderer lines/s) of three runs
+    """
+    stdout = sys.stdout
+    sys.stdout = NullStream()
+    try:
+        return tuple(lines / min(timeit.repeat(func, number=lines, repeat=3))
+                     for func in (color_cm_line, renderer_line))
+    finally:
+        sys.stdout = stdout
+
+
+def main(lines=100000):
+    color_cm, renderer = measure(lines)
+    print "{:>14} {:>14}".format("", "lines/s")
+    print "{:>14} {:>14,.0f}".format("ColorCM", color_cm)
+    print "{:>14} {:>14,.0f}".format("ColorRenderer", renderer)
+    print "{:>14} {:>13.1f}x".format("speedup", renderer / color_cm)
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
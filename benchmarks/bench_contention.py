@@ -0,0 +1,65 @@
+"""
+bench_contention.py
+
+Measure read throughput of get_service as the number of reader threads grows.
+Reads are lock free, so aggregate throughput should hold steady (CPython's GIL
+prevents it from growing) rather than collapse under lock contention. The same
+workload is run against a lookup guarded by the module lock for comparison.
+
+usage: python -m benchmarks.bench_contention [calls_per_thread]
+"""
+import sys
+import threading
+import time
+
+from benchmarks.context import service_locator
+
+
+class BenchService(object):
+    """service registered for the benchmark"""
+    pass
+
+
+def locked_lookup(service_key):
+    """
+    the pre copy-on-write read path: a dict lookup under the locator lock
+    """
+    with service_locator.LockCM(service_locator.SERVICE_LOCATOR._lock):
+        return service_locator.SERVICE_LOCATOR._services[service_key]
+
+
+def run(lookup, thread_count, calls, keys=(BenchService,)):
+    """
+    run `calls` lookups in each of `thread_count` threads, returning the
+    aggregate number of lookups per second. Thread i looks up keys[i % len(keys)].
+    """
+    start_gate = threading.Event()
+
+    def worker(key):
+        start_gate.wait()
+        for _ in xrange(calls):
+            lookup(key)
+
+    threads = [threading.Thread(target=worker, args=(keys[idx % len(keys)],))
+               for idx in xrange(thread_count)]
+    for thread in threads:
+        thread.start()
+    start = time.time()
+    start_gate.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+    return (thread_count * calls) / elapsed
+
+
+def main(calls=20000):
+    service_locator.register(BenchService, BenchService())
+    print "{:>8} {:>18} {:>18}".format("threads", "lock-free ops/s", "locked ops/s")
+    for thread_count in (1, 2, 4, 8, 16, 32, 64):
+        free = run(service_locator.get_service, thread_count, calls)
+        locked = run(locked_lookup, thread_count, calls)
+        print "{:>8} {:>18,.0f} {:>18,.0f}".format(thread_count, free, locked)
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,59 @@
+"""
+bench_memory.py
+
+Report the memory held per ServiceProxy and per ServiceBinding, as created by
+get_service_proxy. Sizes are the shallow size of each object plus that of its
+__dict__ (unless it uses __slots__, whose __dict__ is created on demand) and of
+the constructor args stored on the proxy.
+
+usage: python -m benchmarks.bench_memory [count]
+"""
+import sys
+
+from benchmarks.context import service_locator
+
+
+class BenchService(object):
+    """service bound for the benchmark"""
+    def __init__(self, name):
+        self.name = name
+
+
+def sizeof(obj, *attrs):
+    """
+    shallow size of `obj`, its __dict__ and the named attributes
+    """
+    size = sys.getsizeof(obj)
+    if not hasattr(type(obj), "__slots__"):
+        size += sys.getsizeof(obj.__dict__)
+    for attr in attrs:
+        try:
+            size += sys.getsizeof(object.__getattribute__(obj, attr))
+        except AttributeError:
+            pass
+    return size
+
+
+def measure(count=10000):
+    """
+    create `count` proxies, each bound by its own module name, returning the
+    average (bytes per proxy, bytes per binding)
+    """
+    proxies = [service_locator.get_service_proxy(BenchService, "bench.module{}".format(idx))
+               ("bench.module{}".format(idx)) for idx in xrange(count)]
+    bindings = [binding for binding in service_locator.SERVICE_LOCATOR.bindings()
+                if binding.bind_key is BenchService]
+    proxy_bytes = sum(sizeof(proxy, "_args", "_kwargs", "_call") for proxy in proxies)
+    binding_bytes = sum(sizeof(binding) for binding in bindings)
+    return proxy_bytes / float(len(proxies)), binding_bytes / float(len(bindings))
+
+
+def main(count=10000):
+    per_proxy, per_binding = measure(count)
+    print "{:>12} {:>10}".format("", "bytes")
+    print "{:>12} {:>10.1f}".format("proxy", per_proxy)
+    print "{:>12} {:>10.1f}".format("binding", per_binding)
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,40 @@
+"""
+bench_proxy.py
+
+Compare the cost of calling a method directly on a service, through a
+forwarding ServiceProxy, and through a ServiceProxy which caches methods.
+
+usage: python -m benchmarks.bench_proxy [calls]
+"""
+import sys
+import timeit
+
+from benchmarks.context import service_locator
+
+
+class BenchService(object):
+    """service registered for the benchmark"""
+    def __init__(self, name):
+        self.name = name
+
+    def info(self, *args):
+        """stand in for a logging call"""
+        pass
+
+
+def main(calls=1000000):
+    service_locator.register(BenchService, BenchService)
+    direct = BenchService(__name__)
+    forwarding = service_locator.ServiceProxy(BenchService, cache_methods=False)(__name__)
+    caching = service_locator.ServiceProxy(BenchService, cache_methods=True)(__name__)
+    # resolve both proxies before timing
+    forwarding.info()
+    caching.info()
+    print "{:>12} {:>12}".format("", "ns/call")
+    for label, target in (("direct", direct), ("forwarding", forwarding), ("caching", caching)):
+        elapsed = timeit.timeit(lambda: target.info("message"), number=calls)
+        print "{:>12} {:>12.1f}".format(label, elapsed / calls * 1e9)
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,7 @@
+"""
+set up service locator in benchmarks
+"""
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', "src")))
+import service_locator
@@ -0,0 +1,303 @@
+"""
+run.py
+
+Benchmark suite for the service locator hot paths. Each benchmark reports one
+or more metrics, all of which are costs (lower is better): nanoseconds per
+operation or bytes per object. Timings are the best of several repeats.
+
+Results are written as JSON, with sorted keys so that runs diff cleanly. A
+previous run may be supplied as a baseline, in which case each metric is compared
+against it and the exit status is 1 if any has regressed beyond its tolerance.
+
+Timings on a busy machine are only ever slower than they should be, so a metric
+which appears to have regressed is measured again, up to `--retries` times,
+keeping its best timing, before being reported as a regression. Metrics measured
+with several threads depend on how the interpreter schedules them more than on
+the code, so are reported but not gated on, as are direct calls, measured for
+reference.
+
+usage:
+    python -m benchmarks.run [--quick] [--output results.json]
+                             [--baseline baseline.json] [--tolerance 0.25]
+                             [--retries 3]
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+from benchmarks.context import service_locator
+from benchmarks import bench_contention, bench_memory
+
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32, 64)
+
+# minimum duration, in seconds, of each timed repeat. Shorter repeats are at the
+# mercy of the scheduler
+MIN_REPEAT_TIME = 0.02
+
+# tolerances overriding --tolerance for metrics whose names start with the key
+TOLERANCES = {
+    # sizes are deterministic, so any growth beyond rounding is real
+    "memory.": 0.05,
+}
+
+
+class BenchService(object):
+    """service registered for the benchmarks"""
+    def __init__(self, name=None):
+        self.name = name
+
+    def info(self, *args):
+        """stand in for a logging call"""
+        pass
+
+
+def best(func, number, repeat):
+    """
+    best time, in nanoseconds per call, of `repeat` runs of at least `number` calls
+    to `func`. The number of calls is raised until a run lasts MIN_REPEAT_TIME.
+    """
+    timer = timeit.Timer(func)
+    while timer.timeit(number) < MIN_REPEAT_TIME:
+        number *= 2
+    return min(timer.repeat(number=number, repeat=repeat)) / number * 1e9
+
+
+def bench_get_service(results, scale, repeat):
+    """latency of get_service"""
+    service_locator.register(BenchService, BenchService)
+    results["get_service.ns"] = best(lambda: service_locator.get_service(BenchService),
+                                     100000 * scale, repeat)
+
+
+def bench_proxy(results, scale, repeat):
+    """first resolution and steady state access of ServiceProxy"""
+    service_locator.register(BenchService, BenchService)
+    count = 1000 * scale
+    first = []
+    for _ in xrange(repeat):
+        proxies = [service_locator.ServiceProxy(BenchService)("bench") for _ in xrange(count)]
+
+        def resolve_all():
+            for proxy in proxies:
+                proxy.name
+        first.append(timeit.timeit(resolve_all, number=1) / count * 1e9)
+    results["proxy.first_resolution.ns"] = min(first)
+    for label, cache_methods in (("forwarding", False), ("caching", True)):
+        proxy = service_locator.ServiceProxy(BenchService, cache_methods)("bench")
+        proxy.info()
+        results["proxy.{}_call.ns".format(label)] = best(lambda: proxy.info("message"),
+                                                          100000 * scale, repeat)
+    direct = BenchService("bench")
+    results["proxy.direct_call.ns"] = best(lambda: direct.info("message"), 100000 * scale, repeat)
+
+
+def bench_threads(results, scale, repeat):
+    """
+    has_service and register under contention. Every thread looks up the same key,
+    registered beforehand, and registers a key of its own, so that registrations
+    replace services rather than add them
+    """
+    has_key = "bench.threads.has_service"
+    service_locator.register(has_key, BenchService)
+    keys = ["bench.threads.{}".format(idx) for idx in xrange(max(THREAD_COUNTS))]
+    for key in keys:
+        service_locator.register(key, BenchService)
+    calls = 2000 * scale
+    for thread_count in THREAD_COUNTS:
+        has_service = max(bench_contention.run(service_locator.SERVICE_LOCATOR.has_service,
+                                               thread_count, calls, [has_key])
+                          for _ in xrange(repeat))
+        results["has_service.threads_{:02d}.ns".format(thread_count)] = 1e9 / has_service
+        # registration is expected to be rare, so it is run with fewer calls
+        register = max(bench_contention.run(lambda key: service_locator.register(key, BenchService),
+                                            thread_count, calls / 10, keys)
+                       for _ in xrange(repeat))
+        results["register.threads_{:02d}.ns".format(thread_count)] = 1e9 / register
+
+
+def bench_unbound(results, scale, repeat, max_bindings):
+    """
+    unbound_services and unbound_count as the number of bindings grows: bindings of
+    a registered key, which are skipped, and bindings of distinct unregistered keys,
+    which are all reported
+    """
+    class Unbound(object):
+        """key which is never registered"""
+        pass
+
+    # a locator of its own, so that the bindings of one run do not weigh on the next
+    locator = service_locator.ServiceLocator()
+    locator.register(BenchService, BenchService)
+    for idx in xrange(10):
+        locator.get_service_proxy(Unbound, "bench.unbound.{}".format(idx))
+    bound = 0
+    size = 1000
+    while size <= max_bindings:
+        for idx in xrange(bound, size):
+            locator.register_binding(BenchService, "bench.bindee.{}".format(idx))
+        bound = size
+        results["unbound_services.bindings_{:07d}.ns".format(size)] = best(
+            locator.unbound_services, 100 * scale, repeat)
+        results["unbound_count.bindings_{:07d}.ns".format(size)] = best(
+            locator.unbound_count, 1000 * scale, repeat)
+        size *= 10
+    unbound = 0
+    size = 1000
+    # every unbound binding is listed, so fewer suffice to dominate the timing
+    while size <= max_bindings / 10:
+        for idx in xrange(unbound, size):
+            locator.get_service_proxy("bench.unbound_key.{}".format(idx), "bench.bindee")
+        unbound = size
+        results["unbound_services.unbound_keys_{:07d}.ns".format(size)] = best(
+            locator.unbound_services, 1, repeat)
+        size *= 10
+
+
+def bench_memory_use(results, scale, repeat):
+    """memory per proxy and binding"""
+    per_proxy, per_binding = bench_memory.measure(10000)
+    results["memory.proxy.bytes"] = per_proxy
+    results["memory.binding.bytes"] = per_binding
+
+
+# the benchmarks, and the prefixes of the metrics each reports
+BENCHMARKS = (
+    (bench_get_service, ("get_service.",)),
+    (bench_proxy, ("proxy.",)),
+    (bench_threads, ("has_service.", "register.")),
+    (bench_unbound, ("unbound_services.", "unbound_count.")),
+    (bench_memory_use, ("memory.",)),
+)
+
+
+def measure(quick=False, names=None):
+    """
+    run the benchmarks reporting any of the metrics `names`, or all of them if
+    `names` is None, returning their results
+    """
+    scale = 1 if quick else 5
+    repeat = 5 if quick else 9
+    results = {}
+    for benchmark, prefixes in BENCHMARKS:
+        if names is not None and not any(name.startswith(prefixes) for name in names):
+            continue
+        if benchmark is bench_unbound:
+            benchmark(results, scale, repeat, 10 ** 5 if quick else 10 ** 6)
+        else:
+            benchmark(results, scale, repeat)
+    return results
+
+
+def run(quick=False):
+    """
+    run the suite, returning a JSON serializable dict of metadata and results
+    """
+    results = measure(quick)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def gated(name):
+    """
+    whether a regression of the metric `name` fails the comparison. Direct calls
+    are a reference for the proxy overhead, and involve no locator code
+    """
+    if name == "proxy.direct_call.ns":
+        return False
+    return ".threads_" not in name or name.endswith(".threads_01.ns")
+
+
+def regressed(name, value, base, tolerance):
+    """
+    whether the metric `name` regressed from `base` to `value`, given the default
+    `tolerance`, which TOLERANCES may override
+    """
+    for prefix, override in TOLERANCES.iteritems():
+        if name.startswith(prefix):
+            tolerance = override
+    return gated(name) and value / base - 1 > tolerance
+
+
+def confirm(current, baseline, tolerance, retries):
+    """
+    measure the metrics of `current` which appear to have regressed from `baseline`
+    again, up to `retries` times, keeping the best of the measurements
+    """
+    results = current["results"]
+    for _ in xrange(retries):
+        suspects = [name for name, value in results.iteritems()
+                    if baseline["results"].get(name)
+                    and regressed(name, value, baseline["results"][name], tolerance)]
+        if not suspects:
+            return
+        for name, value in measure(current["meta"]["quick"], suspects).iteritems():
+            results[name] = min(results.get(name, value), value)
+
+
+def compare(current, baseline, tolerance):
+    """
+    print a comparison of `current` results against `baseline` results, returning
+    the names of the gated metrics which regressed by more than their tolerance
+    """
+    regressions = []
+    print "{:<40} {:>14} {:>14} {:>9}".format("metric", "baseline", "current", "change")
+    for name in sorted(current["results"]):
+        value = current["results"][name]
+        base = baseline["results"].get(name)
+        if not base:
+            print "{:<40} {:>14} {:>14.1f} {:>9}".format(name, "-", value, "new")
+            continue
+        change = value / base - 1
+        flag = ""
+        if not gated(name):
+            flag = " (not gated)"
+        elif regressed(name, value, base, tolerance):
+            regressions.append(name)
+            flag = " REGRESSED"
+        print "{:<40} {:>14.1f} {:>14.1f} {:>+8.1%}{}".format(name, base, value, change, flag)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="service locator benchmark suite")
+    parser.add_argument("--quick", action="store_true",
+                        help="fewer iterations and at most 10^5 bindings")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="compare results against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="fractional slowdown counted as a regression, for metrics "
+                             "without a tolerance of their own (default 0.25)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="times to measure apparently regressed metrics again (default 3)")
+    args = parser.parse_args(argv)
+
+    current = run(args.quick)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        confirm(current, baseline, args.tolerance, args.retries)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(current, fh, indent=2, sort_keys=True, separators=(",", ": "))
+    if baseline is not None:
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print "\n{} metric(s) regressed".format(len(regressions))
+            return 1
+    elif not args.output:
+        print json.dumps(current, indent=2, sort_keys=True, separators=(",", ": "))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
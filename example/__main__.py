@@ -9,27 +9,32 @@ from example.services import (
     BaseFrombulator,
     BaseLogger
 )
-from example.dioculator import Dioculator
-from example.frombulator import Frombulator
-from example.logger import (ColorLogger, Logger, EnvColorLogger, EnvLogger)
 from example.bla import Bla
 
 # configure the service_locator to expect service_keys
-# to be superclasses of registered services
+# to be superclasses of registered services, have proxies
+# such as the module level LOGGERs cache the methods of their service,
+# and check that services registered by import path exist
 service_locator.configure(
     key_is_superclass=True,
-    allow_instances=False
+    allow_instances=False,
+    cache_proxy_methods=True,
+    validate_import_paths=True
 )
-# register some services
+# register some services. Services are registered by import path,
+# so that their modules are only imported once they are needed
 # try commenting out one or the other
-service_locator.register(BaseLogger, EnvColorLogger)
+# loggers are shared between the proxies which ask for the same name
+service_locator.register(BaseLogger, "example.logger:EnvColorLogger", service_locator.SHARED)
 # alternative to ColorLogger
-#service_locator.register(BaseLogger, Logger)
+#service_locator.register(BaseLogger, "example.logger:Logger")
+# alternative which writes from a background thread, in batches
+#service_locator.register(BaseLogger, "example.logger:AsyncLogger")
 # example mistake
-#service_locator.register(BaseLogger, Dioculator)
+#service_locator.register(BaseLogger, "example.dioculator:Dioculator")
 
-service_locator.register(BaseDioculator, Dioculator)
-service_locator.register(BaseFrombulator, Frombulator)
+service_locator.register(BaseDioculator, "example.dioculator:Dioculator")
+service_locator.register(BaseFrombulator, "example.frombulator:Frombulator")
 
 def validate():
     missing = service_locator.unbound_services()
@@ -41,6 +46,9 @@ def validate():
         sys.exit()
 
 validate()
+# build the services requested by proxies up front, rather than on first use
+service_locator.warm_up()
+
 def main():
     """
     entry point for exe
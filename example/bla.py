@@ -14,7 +14,8 @@ class Bla(object):
     interfaces, we can instruct service_locator to expect keys to be superclasses
     of registered services, thus establishing a contract for behavior.
     """
-    dioculator = service_locator.get_service_proxy(BaseDioculator, ".".join((__name__,'Bla')))("frombulator")
+    # resolved on first access, then stored on the class in place of the Inject
+    dioculator = service_locator.Inject(BaseDioculator, args=("frombulator",))
 
     def __init__(self):
         """
@@ -1,11 +1,15 @@
 """
 Utility classes relating to coloring text output to the terminal.
 """
+import os
 import sys
 __all__ = (
     "BgColors",
     "printit",
-    "ColorCM"
+    "ColorCM",
+    "ColorRenderer",
+    "colors_enabled",
+    "renderer"
 )
 
 class BgColors(object):
@@ -125,3 +129,56 @@ class ColorCM(object):
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
         self.func("{}".format(self.colors.endc))
+
+
+# whether to color output, decided once. See colors_enabled
+_COLORS_ENABLED = None
+
+def colors_enabled():
+    """
+    Whether to color output: stdout is a terminal, and the NO_COLOR env var is not
+    set (see no-color.org). Decided on the first call, and remembered.
+    """
+    global _COLORS_ENABLED
+    if _COLORS_ENABLED is None:
+        isatty = getattr(sys.stdout, "isatty", None)
+        _COLORS_ENABLED = "NO_COLOR" not in os.environ and bool(isatty and isatty())
+    return _COLORS_ENABLED
+
+
+class ColorRenderer(object):
+    """
+    Precompiled alternative to ColorCM. The color codes are resolved once, when
+    the renderer is built, and each message is written to stdout with a single
+    write of prefix, message, suffix and newline.
+    """
+    def __init__(self, color_name, use_colors=None):
+        """
+        Parameters
+        ----------
+        color_name: string
+            The name of the color to format messages with.
+        use_colors: bool | None
+            Whether to actually color messages. Defaults to colors_enabled().
+        """
+        if use_colors is None:
+            use_colors = colors_enabled()
+        colors = BgColors(use_colors)
+        self.prefix = getattr(colors, color_name.lower())
+        self.suffix = colors.endc + "\n"
+
+    def __call__(self, *args):
+        sys.stdout.write(self.prefix + " ".join(args) + self.suffix)
+
+
+# renderers by color name, built on first use. See renderer
+_RENDERERS = {}
+
+def renderer(color_name):
+    """
+    retrieve the shared ColorRenderer for `color_name`
+    """
+    try:
+        return _RENDERERS[color_name]
+    except KeyError:
+        return _RENDERERS.setdefault(color_name, ColorRenderer(color_name))
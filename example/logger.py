@@ -5,10 +5,16 @@ Implementations of logger. We have ColoredLogger and Logger
 """
 from example.context import service_locator
 from example.services import BaseLogger
-from example.color_util import (ColorCM, printit)
+from example.color_util import (BgColors, colors_enabled, renderer)
+import atexit
 import os
+import sys
+import threading
+import time
+import traceback
+import Queue
 
-__all__ = ("Logger", "EnvLogger", "ColorLogger", "EnvColorLogger")
+__all__ = ("Logger", "EnvLogger", "ColorLogger", "EnvColorLogger", "AsyncLogger", "AsyncWriter")
 
 LEVELS = {"debug": 10, "info" : 20, "warn": 30}
 def lookup_level(level):
@@ -93,22 +99,19 @@ class ColorLogger(BaseLogger):
         """
         trivial debug impl
         """
-        with ColorCM(printit, "blue") as colorm:
-            colorm("DEBUG | {} |".format(self.name), *args)
+        renderer("blue")("DEBUG | {} |".format(self.name), *args)
 
     def info(self, *args):
         """
         trivial info impl
         """
-        with ColorCM(printit, "green") as colorm:
-            colorm("INFO  | {} |".format(self.name), " ".join(args))
+        renderer("green")("INFO  | {} |".format(self.name), " ".join(args))
 
     def warn(self, *args):
         """
         trivial warn impl
         """
-        with ColorCM(printit, "red") as colorm:
-            colorm("WARN  | {} |".format(self.name), " ".join(args))
+        renderer("red")("WARN  | {} |".format(self.name), " ".join(args))
 
 
 class EnvColorLogger(BaseLogger):
@@ -128,22 +131,219 @@ class EnvColorLogger(BaseLogger):
         trivial debug impl
         """
         if self.level <= lookup_level("debug"):
-            with ColorCM(printit, "blue") as colorm:
-                colorm("DEBUG | {} |".format(self.name), *args)
+            renderer("blue")("DEBUG | {} |".format(self.name), *args)
 
     def info(self, *args):
         """
         trivial info impl
         """
         if self.level <= lookup_level("info"):
-            with ColorCM(printit, "green") as colorm:
-                colorm("INFO  | {} |".format(self.name), " ".join(args))
+            renderer("green")("INFO  | {} |".format(self.name), " ".join(args))
 
     def warn(self, *args):
         """
         trivial warn impl
         """
         if self.level <= lookup_level("warn"):
-            with ColorCM(printit, "red") as colorm:
-                colorm("WARN  | {} |".format(self.name), " ".join(args))
+            renderer("red")("WARN  | {} |".format(self.name), " ".join(args))
 
+
+
+# overflow policies of AsyncWriter: what to do with a record when the queue is full
+DROP_NEW = "drop_new"
+DROP_OLD = "drop_old"
+BLOCK = "block"
+
+# level names as printed, and their colors
+LABELS = {"debug": ("DEBUG", "blue"), "info": ("INFO ", "green"), "warn": ("WARN ", "red")}
+
+
+class AsyncWriter(object):
+    """
+    Writes log records to a stream from a background thread. Records are queued
+    by the logging thread, which returns immediately, and written in batches:
+    the writer waits up to `flush_interval` after the first record of a batch for
+    more to arrive, then formats the lot and writes it with a single write and
+    flush.
+    """
+    _STOP = object()
+
+    def __init__(self, stream=None, max_queue=10000, flush_interval=0.05, batch_size=512,
+                 overflow=DROP_NEW, use_colors=None):
+        """
+        Parameters
+        ----------
+        stream: file like
+            Where to write records. Defaults to sys.stdout, looked up at write time.
+        max_queue: int
+            Maximum number of records waiting to be written.
+        flush_interval: float
+            Seconds to wait for a batch to fill before writing it.
+        batch_size: int
+            Maximum number of records written at once.
+        overflow: DROP_NEW | DROP_OLD | BLOCK
+            What to do when the queue is full: discard the new record, discard
+            the oldest queued record, or wait for room. Discarded records are
+            counted in `dropped`.
+        use_colors: bool | None
+            Whether to color records by level. Defaults to colors_enabled() when
+            writing to stdout, and to False for other streams.
+        """
+        if overflow not in (DROP_NEW, DROP_OLD, BLOCK):
+            raise ValueError("Unknown overflow policy: {}".format(overflow))
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.overflow = overflow
+        if use_colors is None:
+            use_colors = colors_enabled() if stream is None else False
+        colors = BgColors(use_colors)
+        # the format of a line per level, with its color codes resolved once
+        self._formats = dict(
+            (level, getattr(colors, color) + label + " | {} | {}\n" + colors.endc)
+            for level, (label, color) in LABELS.iteritems())
+        self.dropped = 0
+        self._queue = Queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._run, name="AsyncWriter")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, record):
+        """
+        Queue a (level, name, args) `record` for writing
+        """
+        try:
+            self._queue.put(record, self.overflow == BLOCK)
+        except Queue.Full:
+            self.dropped += 1
+            if self.overflow == DROP_OLD:
+                try:
+                    self._queue.get_nowait()
+                    self._queue.put_nowait(record)
+                except (Queue.Empty, Queue.Full):
+                    pass
+
+    def close(self):
+        """
+        Write the queued records and stop the background thread
+        """
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _format(self, record):
+        """
+        format a record as a line of output
+        """
+        level, name, args = record
+        return self._formats[level].format(name, " ".join(args))
+
+    def _run(self):
+        """
+        background thread: collect records into batches, and write them
+        """
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(True, remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except Queue.Empty:
+                    break
+            if self._STOP in batch:
+                stopping = True
+                batch.remove(self._STOP)
+                # write whatever was queued ahead of the request to stop
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except Queue.Empty:
+                        break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        """
+        format and write a batch of records. A record which cannot be formatted,
+        or a batch which cannot be written, is reported to stderr and skipped, so
+        that the writer thread survives it.
+        """
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self._format(record))
+            except Exception:
+                self._report("could not format record {!r}".format(record))
+        if not lines:
+            return
+        stream = self.stream or sys.stdout
+        try:
+            stream.write("".join(lines))
+            stream.flush()
+        except Exception:
+            self._report("could not write {} record(s)".format(len(lines)))
+
+    def _report(self, message):
+        """
+        report a failure of the writer thread to stderr
+        """
+        sys.stderr.write("AsyncWriter: {}\n{}".format(message, traceback.format_exc()))
+
+
+# shared by AsyncLoggers which are not given a writer, and created on first use
+_WRITER = None
+_WRITER_LOCK = threading.Lock()
+
+def default_writer():
+    """
+    retrieve the AsyncWriter shared by AsyncLoggers, writing to stdout and coloring
+    records if colors_enabled()
+    """
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _WRITER = AsyncWriter()
+            atexit.register(_WRITER.close)
+        return _WRITER
+
+
+class AsyncLogger(BaseLogger):
+    """
+    Asynchronous logger implementation. Log calls queue a record for an AsyncWriter
+    to format and write in batches from a background thread, so they return
+    without waiting on the output stream. Adds ability to look up minimum logging
+    level from env using LOGGING_LEVEL env var.
+    """
+    def __init__(self, name, level=os.environ.get("LOGGING_LEVEL", "debug"), writer=None):
+        """
+        set the name, and the writer, which defaults to one shared by all AsyncLoggers
+        """
+        self.name = name
+        self.level = lookup_level(level)
+        self.writer = writer or default_writer()
+
+    def debug(self, *args):
+        """
+        queue a debug record
+        """
+        if self.level <= LEVELS["debug"]:
+            self.writer.put(("debug", self.name, args))
+
+    def info(self, *args):
+        """
+        queue an info record
+        """
+        if self.level <= LEVELS["info"]:
+            self.writer.put(("info", self.name, args))
+
+    def warn(self, *args):
+        """
+        queue a warn record
+        """
+        if self.level <= LEVELS["warn"]:
+            self.writer.put(("warn", self.name, args))
@@ -1,8 +1,10 @@
 """
 basic tests
 """
+import sys
 import unittest
-from example.color_util import ColorCM
+from example import color_util
+from example.color_util import ColorCM, ColorRenderer
 
 class Callme(object):
     """callme records calls"""
@@ -24,3 +26,58 @@ class TestColors(unittest.TestCase):
         with ColorCM(callme, "blue") as colorm:
             colorm("this is a test")
         self.assertEqual(callme.myargs, ["\033[94mthis is a test", "\033[0m"])
+
+
+class Stream(object):
+    """stream which records writes"""
+    def __init__(self, isatty=True):
+        self.writes = []
+        self._isatty = isatty
+
+    def write(self, text):
+        self.writes.append(text)
+
+    def isatty(self):
+        return self._isatty
+
+
+class TestColorRenderer(unittest.TestCase):
+    """test the precompiled color rendering path"""
+
+    def setUp(self):
+        self.stdout = sys.stdout
+        sys.stdout = Stream()
+        color_util._COLORS_ENABLED = None
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+        color_util._COLORS_ENABLED = None
+
+    def test_writes_each_message_once(self):
+        """prefix, message, suffix and newline are written together"""
+        ColorRenderer("blue", use_colors=True)("this is", "a test")
+        self.assertEqual(sys.stdout.writes, ["\033[94mthis is a test\033[0m\n"])
+
+    def test_writes_plain_messages_without_colors(self):
+        """no color codes are written when colors are disabled"""
+        ColorRenderer("blue", use_colors=False)("this is a test")
+        self.assertEqual(sys.stdout.writes, ["this is a test\n"])
+
+    def test_detects_terminal(self):
+        """colors are only enabled on a terminal"""
+        sys.stdout = Stream(isatty=False)
+        self.assertFalse(color_util.colors_enabled())
+
+    def test_honors_no_color(self):
+        """colors are disabled by NO_COLOR"""
+        color_util.os.environ["NO_COLOR"] = "1"
+        try:
+            self.assertFalse(color_util.colors_enabled())
+        finally:
+            del color_util.os.environ["NO_COLOR"]
+
+    def test_decides_once(self):
+        """the decision is remembered"""
+        enabled = color_util.colors_enabled()
+        sys.stdout = Stream(isatty=not enabled)
+        self.assertEqual(enabled, color_util.colors_enabled())
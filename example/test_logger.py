@@ -0,0 +1,120 @@
+"""
+tests of the asynchronous logger
+"""
+import StringIO
+import sys
+import threading
+import unittest
+from example.logger import AsyncLogger, AsyncWriter, DROP_NEW, DROP_OLD
+
+
+class Stream(object):
+    """stream which records writes, optionally blocking until released"""
+    def __init__(self, blocked=False):
+        self.writes = []
+        self.released = threading.Event()
+        if not blocked:
+            self.released.set()
+
+    def write(self, text):
+        self.released.wait()
+        self.writes.append(text)
+
+    def flush(self):
+        pass
+
+
+class TestAsyncLogger(unittest.TestCase):
+    """test AsyncLogger and AsyncWriter"""
+
+    def test_writes_records_in_batches(self):
+        """records logged together are written together"""
+        stream = Stream()
+        writer = AsyncWriter(stream, flush_interval=0.05)
+        logger = AsyncLogger("test", "debug", writer)
+        logger.debug("one")
+        logger.info("two", "three")
+        logger.warn("four")
+        writer.close()
+        self.assertEqual(stream.writes, [
+            "DEBUG | test | one\nINFO  | test | two three\nWARN  | test | four\n"])
+
+    def test_survives_unformattable_records(self):
+        """a record which cannot be formatted is skipped, not fatal to the writer"""
+        stream = Stream()
+        writer = AsyncWriter(stream, flush_interval=0, batch_size=1)
+        logger = AsyncLogger("test", "debug", writer)
+        stderr, sys.stderr = sys.stderr, StringIO.StringIO()
+        try:
+            logger.info(42)
+            logger.info("written")
+            writer.close()
+            report = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        self.assertEqual("".join(stream.writes), "INFO  | test | written\n")
+        self.assertTrue("could not format record" in report)
+
+    def test_colors_records_by_level(self):
+        """colored records are wrapped in the color codes of their level"""
+        stream = Stream()
+        writer = AsyncWriter(stream, use_colors=True)
+        AsyncLogger("test", "debug", writer).warn("four")
+        writer.close()
+        self.assertEqual("".join(stream.writes), "\033[93mWARN  | test | four\n\033[0m")
+
+    def test_colors_other_streams_only_on_request(self):
+        """records written to a stream other than stdout are not colored by default"""
+        stream = Stream()
+        writer = AsyncWriter(stream)
+        AsyncLogger("test", "debug", writer).info("two")
+        writer.close()
+        self.assertEqual("".join(stream.writes), "INFO  | test | two\n")
+
+    def test_honors_level(self):
+        """records below the level are not queued"""
+        stream = Stream()
+        writer = AsyncWriter(stream)
+        logger = AsyncLogger("test", "warn", writer)
+        logger.info("skipped")
+        logger.warn("written")
+        writer.close()
+        self.assertEqual("".join(stream.writes), "WARN  | test | written\n")
+
+    def test_drops_new_records_when_full(self):
+        """with DROP_NEW, records beyond the queue size are discarded"""
+        stream = Stream(blocked=True)
+        writer = AsyncWriter(stream, max_queue=2, flush_interval=0, batch_size=1,
+                             overflow=DROP_NEW)
+        logger = AsyncLogger("test", "debug", writer)
+        logger.info("0")
+        # wait for the writer to take the first record and block on the stream
+        while writer._queue.qsize():
+            pass
+        for idx in range(1, 5):
+            logger.info(str(idx))
+        stream.released.set()
+        writer.close()
+        self.assertEqual(2, writer.dropped)
+        self.assertEqual("".join(stream.writes).split(), "INFO | test | 0 INFO | test | 1 INFO | test | 2".split())
+
+    def test_drops_old_records_when_full(self):
+        """with DROP_OLD, the oldest queued records are discarded"""
+        stream = Stream(blocked=True)
+        writer = AsyncWriter(stream, max_queue=2, flush_interval=0, batch_size=1,
+                             overflow=DROP_OLD)
+        logger = AsyncLogger("test", "debug", writer)
+        logger.info("0")
+        while writer._queue.qsize():
+            pass
+        for idx in range(1, 5):
+            logger.info(str(idx))
+        stream.released.set()
+        writer.close()
+        self.assertEqual(2, writer.dropped)
+        self.assertEqual("".join(stream.writes).split(), "INFO | test | 0 INFO | test | 3 INFO | test | 4".split())
+
+    def test_rejects_unknown_overflow_policy(self):
+        """overflow must be one of the policies"""
+        with self.assertRaises(ValueError):
+            AsyncWriter(Stream(), overflow="explode")
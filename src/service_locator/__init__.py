@@ -15,6 +15,10 @@ ServiceLocator instance in the module and providing convenience functions for
 communicating with it.
 
 Interactions with the ServiceLocator instance should be threadsafe by default.
+Writes (registration) are serialized through each ServiceLocator's lock. Reads are
+lock free: registered services live in a dict snapshot which is never mutated
+once published. `register` builds a new snapshot and swaps it in (copy-on-write),
+so a reader always sees either the old or the new registry, never a partial one.
 """
 
 # disable 'redifined-outer-name' because it is ok in this case
@@ -22,66 +26,414 @@ Interactions with the ServiceLocator instance should be threadsafe by default.
 # disable 'too-few-pubic-methods' because it doesnt make sense here
 # pylint: disable=R0903
 
+import ast
+import collections
+import functools
+import imp
+import importlib
 import inspect
+import json
+import os
+import re
+import sys
+import time
 try:
     import thread
     import threading
 except ImportError:
     thread = None
 import weakref
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
+try:
+    import greenlet
+except ImportError:
+    greenlet = None
 
 __all__ = (
     "get_service",
+    "get_services",
+    "get_instance",
     "register",
     "services",
     "get_service_proxy",
-    "configure"
+    "inject",
+    "Inject",
+    "configure",
+    "dependency_graph",
+    "warm_up",
+    "seal",
+    "enable_metrics",
+    "disable_metrics",
+    "get_metrics",
+    "enable_profiling",
+    "disable_profiling",
+    "get_profiler",
+    "prefork",
+    "after_fork",
+    "export_registry",
+    "bootstrap",
+    "checkout",
+    "pool_stats",
+    "Pooled",
+    "Shared",
+    "SINGLETON",
+    "TRANSIENT",
+    "THREAD_LOCAL",
+    "CONTEXT_LOCAL",
+    "POOLED",
+    "SHARED"
 )
 
 #
-#_LOCK is used to serialize access to shared data structures in this module.
-# This is borrowed from python logging
+# Service lifetimes, which may be supplied to register along with a service class.
 #
-if thread:
-    _LOCK = threading.RLock()
-else:
-    _LOCK = None
-
-def _acquire_lock():
+SINGLETON = "singleton"
+TRANSIENT = "transient"
+THREAD_LOCAL = "thread_local"
+CONTEXT_LOCAL = "context_local"
+POOLED = "pooled"
+SHARED = "shared"
+
+def _acquire_lock(lock):
     """
-    Acquire the module-level lock for serializing access to shared data.
+    Acquire `lock`, which serializes access to the shared data of a ServiceLocator,
+    timing the wait if metrics are enabled.
 
     This should be released with _release_lock().
     """
-    if _LOCK:
-        _LOCK.acquire()
+    metrics = _METRICS
+    if metrics is None:
+        lock.acquire()
+    else:
+        start = time.time()
+        lock.acquire()
+        metrics.record(Metrics.LOCK_WAIT, None, time.time() - start)
+
+def _release_lock(lock):
+    """
+    Release `lock`, acquired by calling _acquire_lock().
+    """
+    lock.release()
 
-def _release_lock():
+class _NullLock(object):
     """
-    Release the module-level lock acquired by calling _acquire_lock().
+    Stand in for a lock when threading is unavailable
     """
-    if _LOCK:
-        _LOCK.release()
+    def acquire(self, *args):
+        return True
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        pass
+
+
+class Metrics(object):
+    """
+    Collects measurements of the service locator: lookups per service key, hits
+    and misses of ServiceProxy resolution, time spent instantiating services,
+    and time spent waiting on the locks of ServiceLocators.
+
+    Each measurement is an event, aggregated per service key into a count, a total
+    and a maximum, and passed on to any sinks. A sink is a callable taking the
+    event name, the service key (None for LOCK_WAIT) and the value - 1 for counted
+    events, seconds for timed ones. Sinks are called on the thread which triggered
+    the event, and should be quick.
+
+    Metrics are collected once enabled via `enable_metrics`. Until then, the
+    instrumented code paths only pay for a check of a module global.
+    """
+    LOOKUP = "lookup"
+    RESOLVE_HIT = "resolve_hit"
+    RESOLVE_MISS = "resolve_miss"
+    INSTANTIATE = "instantiate"
+    LOCK_WAIT = "lock_wait"
+
+    def __init__(self, sinks=()):
+        """
+        Parameters
+        ----------
+        sinks : [callable]
+            Callables to pass each event on to
+        """
+        self._lock = threading.Lock() if thread else _NullLock()
+        self._sinks = list(sinks)
+        self._stats = {}
+
+    def add_sink(self, sink):
+        """
+        Pass subsequent events on to `sink` as well
+        """
+        with self._lock:
+            self._sinks = self._sinks + [sink]
+
+    def record(self, event, service_key, value):
+        """
+        Record an `event` concerning `service_key` with the supplied `value`
+        """
+        with self._lock:
+            per_key = self._stats.setdefault(event, {})
+            stats = per_key.get(service_key)
+            if stats is None:
+                per_key[service_key] = [1, value, value]
+            else:
+                stats[0] += 1
+                stats[1] += value
+                if value > stats[2]:
+                    stats[2] = value
+        for sink in self._sinks:
+            sink(event, service_key, value)
+
+    def snapshot(self):
+        """
+        Retrieve a copy of the aggregated measurements.
+
+        Returns
+        -------
+        { event : { service_key : {"count": int, "total": number, "max": number} } }
+        """
+        with self._lock:
+            return dict(
+                (event, dict(
+                    (key, {"count": stats[0], "total": stats[1], "max": stats[2]})
+                    for key, stats in per_key.iteritems()))
+                for event, per_key in self._stats.iteritems())
+
+    def reset(self):
+        """
+        Discard the aggregated measurements
+        """
+        with self._lock:
+            self._stats = {}
+
+#
+# _METRICS is the active Metrics instance, or None when metrics are disabled
+#
+_METRICS = None
+
+
+class Profiler(object):
+    """
+    Records a timeline of service resolution: a span for each ServiceProxy or
+    Inject resolving its service, and for each instantiation of a service class.
+    Spans nest, per thread, as constructors resolve further services, so that the
+    chains responsible for slow startup can be picked out.
+
+    The timeline may be exported as Chrome trace-event JSON, for chrome://tracing
+    or Perfetto, or summarized as a text tree of the slowest chains.
+
+    Spans are recorded once profiling is enabled via `enable_profiling`. Until
+    then, resolution and instantiation only pay for a check of a module global.
+    """
+    RESOLVE = "resolve"
+    INSTANTIATE = "instantiate"
+
+    def __init__(self):
+        self._lock = threading.Lock() if thread else _NullLock()
+        self._local = threading.local() if thread else _NullLock()
+        self._spans = []
+        self._origin = time.time()
+
+    def start(self, kind, service_key, bindee=None):
+        """
+        Open a span of `kind` concerning `service_key`, nested in the span open on
+        the current thread, if any. Close it with `finish`.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        span = {
+            "kind": kind,
+            "key": service_key,
+            "bindee": bindee,
+            "thread": thread.get_ident() if thread else 0,
+            "parent": stack[-1] if stack else None,
+            "start": time.time(),
+            "end": None,
+        }
+        stack.append(span)
+        return span
+
+    def finish(self, span):
+        """
+        Close a `span` opened by `start`
+        """
+        span["end"] = time.time()
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self):
+        """
+        Retrieve the closed spans, in order of their start.
+
+        Returns
+        -------
+        [{"kind": str, "key": Hashable, "bindee": object, "thread": int,
+          "start": float, "duration": float, "depth": int}]
+            Times are in seconds, starts relative to the creation of the Profiler.
+        """
+        with self._lock:
+            spans = sorted(self._spans, key=lambda span: span["start"])
+        return [self._describe(span) for span in spans]
+
+    def _describe(self, span):
+        """
+        the public description of a `span`
+        """
+        depth = 0
+        parent = span["parent"]
+        while parent is not None:
+            depth += 1
+            parent = parent["parent"]
+        return {
+            "kind": span["kind"],
+            "key": span["key"],
+            "bindee": span["bindee"],
+            "thread": span["thread"],
+            "start": span["start"] - self._origin,
+            "duration": span["end"] - span["start"],
+            "depth": depth,
+        }
+
+    def chrome_trace(self):
+        """
+        Retrieve the timeline in the Chrome trace-event format, as a JSON
+        serializable dict of complete ("X") events, timed in microseconds.
+        """
+        pid = os.getpid()
+        events = []
+        for span in self.spans():
+            args = {"key": _key_name(span["key"])}
+            if span["bindee"] is not None:
+                args["bindee"] = str(span["bindee"])
+            events.append({
+                "name": "{} {}".format(span["kind"], args["key"]),
+                "cat": span["kind"],
+                "ph": "X",
+                "ts": span["start"] * 1e6,
+                "dur": span["duration"] * 1e6,
+                "pid": pid,
+                "tid": span["thread"],
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        """
+        Write the timeline to `path` in the Chrome trace-event format
+        """
+        with open(path, "w") as fh:
+            json.dump(self.chrome_trace(), fh)
+
+    def report(self, limit=10):
+        """
+        Summarize the `limit` slowest resolution chains - spans not nested in any
+        other - as a text tree of their nested spans, in milliseconds.
+        """
+        with self._lock:
+            spans = list(self._spans)
+        children = {}
+        for span in spans:
+            children.setdefault(id(span["parent"]), []).append(span)
+        roots = sorted(children.get(id(None), ()),
+                       key=lambda span: span["end"] - span["start"], reverse=True)[:limit]
+        lines = []
+
+        def describe(span, depth):
+            bindee = "" if span["bindee"] is None else " ({})".format(span["bindee"])
+            lines.append("{:>10.3f} ms {}{} {}{} [thread {}]".format(
+                (span["end"] - span["start"]) * 1e3, "  " * depth, span["kind"],
+                _key_name(span["key"]), bindee, span["thread"]))
+            for child in sorted(children.get(id(span), ()), key=lambda child: child["start"]):
+                describe(child, depth + 1)
+
+        for root in roots:
+            describe(root, 0)
+        return "\n".join(lines)
+
+    def reset(self):
+        """
+        Discard the recorded spans
+        """
+        with self._lock:
+            self._spans = []
+
+
+def _key_name(service_key):
+    """
+    A readable name for `service_key`
+    """
+    if inspect.isclass(service_key):
+        return "{}.{}".format(service_key.__module__, service_key.__name__)
+    return str(service_key)
+
+#
+# _PROFILER is the active Profiler, or None when profiling is disabled
+#
+_PROFILER = None
+
+
+def _instantiate(service_key, factory, args, kwargs):
+    """
+    Call `factory` with `args` and `kwargs`, timing it if metrics or profiling
+    are enabled
+    """
+    metrics = _METRICS
+    profiler = _PROFILER
+    if metrics is None and profiler is None:
+        return factory(*args, **kwargs)
+    span = profiler.start(Profiler.INSTANTIATE, service_key) if profiler is not None else None
+    start = time.time()
+    try:
+        return factory(*args, **kwargs)
+    finally:
+        if metrics is not None:
+            metrics.record(Metrics.INSTANTIATE, service_key, time.time() - start)
+        if span is not None:
+            profiler.finish(span)
+
 
 class LockCM(object):
     """
-    Context Manager for creating a threading lock
+    Context Manager holding `lock`, the lock of a ServiceLocator, for the duration
+    of a with block.
     """
+    def __init__(self, lock):
+        self.lock = lock
+
     def __enter__(self):
-        _acquire_lock()
+        _acquire_lock(self.lock)
         return self
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
-        _release_lock()
+        _release_lock(self.lock)
 
 
 class ServiceBinding(object):
     """
     Store the a bind key and bindee for later validation
     """
-    def __init__(self, bind_key, bindee):
+    __slots__ = ("_bind_key", "_bindee", "_proxy")
+
+    def __init__(self, bind_key, bindee, proxy=None):
         self._bind_key = bind_key
         self._bindee = bindee
+        # weak reference to the ServiceProxy handed to the bindee, if any
+        self._proxy = weakref.ref(proxy) if proxy is not None else None
 
     @property
     def bind_key(self):
@@ -93,29 +445,789 @@ class ServiceBinding(object):
         """retrieve the bindee"""
         return self._bindee
 
+    @property
+    def proxy(self):
+        """retrieve the ServiceProxy created for the binding, if it is still alive"""
+        if self._proxy is None:
+            return None
+        return self._proxy()
+
     def __repr__(self):
         return "ServiceBinding(bind_key={}, bindee={})".format(self._bind_key, self._bindee)
 
 
+class _Lifetime(object):
+    """
+    Base class for service lifetimes. A lifetime owns the factory (class) of a
+    service registered with one, and decides when calling it is warranted.
+    """
+    # whether a consumer may hold on to an instance it has been given. Only true
+    # of lifetimes which hand every consumer the same instance
+    shareable = False
+
+    def __init__(self, service_key, factory):
+        self.service_key = service_key
+        self.factory = factory
+
+    def instance(self, args, kwargs):
+        """
+        Retrieve the instance appropriate to the caller, instantiating the factory
+        with `args` and `kwargs` if need be.
+        """
+        raise NotImplementedError()
+
+    def _after_fork(self, hook):
+        """
+        Reinitialize the lifetime in a forked child. If the service has a fork
+        `hook`, instances built in the parent are passed through it or dropped.
+        """
+        pass
+
+
+class _Singleton(_Lifetime):
+    """
+    A single instance, built by the first consumer, shared by all consumers
+    """
+    shareable = True
+
+    def __init__(self, service_key, factory):
+        super(_Singleton, self).__init__(service_key, factory)
+        self._instance = None
+        self._lock = threading.RLock() if thread else _NullLock()
+
+    def instance(self, args, kwargs):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = _instantiate(self.service_key, self.factory, args, kwargs)
+                instance = self._instance
+        return instance
+
+    def _after_fork(self, hook):
+        self._lock = threading.RLock()
+        if hook is not None and self._instance is not None:
+            self._instance = hook(self._instance)
+
+
+class _Transient(_Lifetime):
+    """
+    A new instance every time one is asked for
+    """
+    def instance(self, args, kwargs):
+        return _instantiate(self.service_key, self.factory, args, kwargs)
+
+
+class _ThreadLocal(_Lifetime):
+    """
+    One instance per thread
+    """
+    def __init__(self, service_key, factory):
+        super(_ThreadLocal, self).__init__(service_key, factory)
+        self._local = threading.local() if thread else _NullLock()
+
+    def instance(self, args, kwargs):
+        try:
+            return self._local.instance
+        except AttributeError:
+            instance = self._local.instance = _instantiate(
+                self.service_key, self.factory, args, kwargs)
+            return instance
+
+    def _after_fork(self, hook):
+        # the instances belong to threads of the parent, so are rebuilt on demand
+        if hook is not None:
+            self._local = threading.local()
+
+
+class _ContextLocal(_Lifetime):
+    """
+    One instance per execution context. This is a contextvars context where
+    available (each asyncio task has its own), a greenlet if greenlet is installed,
+    and a thread otherwise.
+    """
+    def __init__(self, service_key, factory):
+        super(_ContextLocal, self).__init__(service_key, factory)
+        if contextvars:
+            self._var = contextvars.ContextVar("service_locator:{}".format(service_key))
+            self.instance = self._context_instance
+        elif greenlet:
+            self._instances = weakref.WeakKeyDictionary()
+            self.instance = self._greenlet_instance
+        else:
+            self._local = _ThreadLocal(service_key, factory)
+            self.instance = self._local.instance
+
+    def _context_instance(self, args, kwargs):
+        instance = self._var.get(None)
+        if instance is None:
+            instance = _instantiate(self.service_key, self.factory, args, kwargs)
+            self._var.set(instance)
+        return instance
+
+    def _greenlet_instance(self, args, kwargs):
+        current = greenlet.getcurrent()
+        instance = self._instances.get(current)
+        if instance is None:
+            instance = self._instances[current] = _instantiate(
+                self.service_key, self.factory, args, kwargs)
+        return instance
+
+    def _after_fork(self, hook):
+        # the instances are rebuilt on demand. A fresh variable leaves the values
+        # set in the current context behind
+        if hook is not None:
+            if contextvars:
+                self._var = contextvars.ContextVar("service_locator:{}".format(self.service_key))
+            elif greenlet:
+                self._instances = weakref.WeakKeyDictionary()
+            else:
+                self._local._after_fork(hook)
+
+
+class Pooled(object):
+    """
+    The configuration of a pool of service instances, supplied to `register` as
+    the lifetime of a service class. POOLED stands for a pool with the defaults.
+    """
+    def __init__(self, min_size=0, max_size=8, idle_timeout=None, validate=None,
+                 args=(), kwargs=None):
+        """
+        Parameters
+        ----------
+        min_size : int
+            Number of instances built on the first checkout and kept thereafter,
+            however long they are idle.
+        max_size : int
+            Maximum number of instances, checked out or idle.
+        idle_timeout : number | None
+            Seconds after which an idle instance beyond `min_size` is discarded.
+            If None, idle instances are kept.
+        validate : callable | None
+            Called with an idle instance before it is checked out. If it returns
+            False, the instance is discarded in favour of another.
+        args : tuple
+            Positional arguments to build instances with.
+        kwargs : dict | None
+            Keyword arguments to build instances with.
+        """
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Invalid pool size: min_size {} max_size {}".format(min_size, max_size))
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.validate = validate
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+
+
+class _PoolCheckout(object):
+    """
+    Context Manager which checks an instance out of a pool, returning it on exit
+    """
+    def __init__(self, pool, block, timeout):
+        self.pool = pool
+        self.block = block
+        self.timeout = timeout
+        self.instance = None
+
+    def __enter__(self):
+        self.instance = self.pool.acquire(self.block, self.timeout)
+        return self.instance
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        instance, self.instance = self.instance, None
+        self.pool.release(instance)
+
+
+class _Pool(_Lifetime):
+    """
+    Instances which are checked out by one consumer at a time, and returned to the
+    pool for the next. See `Pooled`.
+    """
+    def __init__(self, service_key, factory, spec=None):
+        super(_Pool, self).__init__(service_key, factory)
+        self.spec = Pooled() if spec is None else spec
+        self._cond = threading.Condition(threading.Lock()) if thread else _NullLock()
+        # idle instances as (instance, time returned), the least recently returned first
+        self._idle = collections.deque()
+        # number of instances in existence, or being built
+        self._size = 0
+        self._stats = dict.fromkeys(
+            ("checkouts", "waits", "timeouts", "created", "evicted", "invalidated"), 0)
+
+    def instance(self, args, kwargs):
+        raise TypeError("Pooled service {} must be checked out".format(self.service_key))
+
+    def checkout(self, block=True, timeout=None):
+        """
+        Retrieve a context manager checking out an instance. See `ServiceLocator.checkout`.
+        """
+        return _PoolCheckout(self, block, timeout)
+
+    def _build(self):
+        """
+        Build an instance, for which room has been reserved by incrementing _size
+        """
+        try:
+            instance = _instantiate(self.service_key, self.factory, self.spec.args, self.spec.kwargs)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return instance
+
+    def _evict(self, now):
+        """
+        Discard instances idle for longer than the idle timeout, while more than
+        min_size remain. Must be called with the condition held.
+        """
+        idle_timeout = self.spec.idle_timeout
+        if idle_timeout is None:
+            return
+        idle = self._idle
+        while idle and self._size > self.spec.min_size and now - idle[0][1] > idle_timeout:
+            idle.popleft()
+            self._size -= 1
+            self._stats["evicted"] += 1
+
+    def acquire(self, block=True, timeout=None):
+        """
+        Check out an idle instance, or build one if the pool has room, or else wait
+        for one to be returned.
+
+        Raises
+        ------
+        queue.Empty
+            If no instance is available, and `block` is False or `timeout` seconds
+            have passed.
+        """
+        spec = self.spec
+        deadline = None if timeout is None else time.time() + timeout
+        fill = 0
+        with self._cond:
+            if self._size < spec.min_size:
+                fill = spec.min_size - self._size
+                self._size += fill
+        for built in xrange(fill):
+            try:
+                instance = self._build()
+            except Exception:
+                # give up the room reserved for the rest
+                with self._cond:
+                    self._size -= fill - built - 1
+                    self._cond.notify_all()
+                raise
+            self.release(instance)
+        while True:
+            instance = None
+            with self._cond:
+                self._evict(time.time())
+                while not self._idle and self._size >= spec.max_size:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if not block or (remaining is not None and remaining <= 0):
+                        self._stats["timeouts"] += 1
+                        raise queue.Empty("Pool of {} is exhausted".format(self.service_key))
+                    self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+                self._stats["checkouts"] += 1
+                if self._idle:
+                    # the most recently returned instance, leaving the others to go idle
+                    instance = self._idle.pop()[0]
+                else:
+                    self._size += 1
+            if instance is None:
+                return self._build()
+            if spec.validate is None or spec.validate(instance):
+                return instance
+            with self._cond:
+                self._size -= 1
+                self._stats["invalidated"] += 1
+                self._cond.notify()
+
+    def release(self, instance):
+        """
+        Return a checked out `instance` to the pool
+        """
+        with self._cond:
+            self._idle.append((instance, time.time()))
+            self._cond.notify()
+
+    def stats(self):
+        """
+        Retrieve the statistics of the pool. See `ServiceLocator.pool_stats`.
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(size=self._size, idle=len(self._idle),
+                         in_use=self._size - len(self._idle),
+                         min_size=self.spec.min_size, max_size=self.spec.max_size)
+        return stats
+
+    def _after_fork(self, hook):
+        # checked out instances belong to threads of the parent, so are forgotten
+        self._cond = threading.Condition(threading.Lock())
+        self._size = len(self._idle)
+        if hook is not None:
+            self._idle = collections.deque((hook(instance), returned)
+                                           for instance, returned in self._idle)
+
+
+class Shared(object):
+    """
+    The configuration of instances shared between consumers which supply the same
+    constructor arguments, supplied to `register` as the lifetime of a service
+    class. SHARED stands for the default, weak eviction.
+    """
+    def __init__(self, max_size=None):
+        """
+        Parameters
+        ----------
+        max_size : int | None
+            Maximum number of instances to keep, evicting the least recently
+            requested beyond it. If None, an instance is kept for as long as a
+            consumer refers to it, which requires that instances be weakly
+            referenceable.
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError("Invalid max_size: {}".format(max_size))
+        self.max_size = max_size
+
+
+def _args_key(args, kwargs):
+    """
+    Key constructor arguments by value, or return None if they are unhashable
+    """
+    key = (args, tuple(sorted(kwargs.iteritems()))) if kwargs else (args,)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class _SharedByArgs(_Lifetime):
+    """
+    One instance per distinct set of constructor arguments, shared by all the
+    consumers which supply them. See `Shared`.
+    """
+    shareable = True
+
+    def __init__(self, service_key, factory, spec=None):
+        super(_SharedByArgs, self).__init__(service_key, factory)
+        self.spec = Shared() if spec is None else spec
+        self._lock = threading.RLock() if thread else _NullLock()
+        if self.spec.max_size is None:
+            # classic classes have no __weakrefoffset__, and are weakly referenceable
+            if not getattr(factory, "__weakrefoffset__", True):
+                raise ValueError("Instances of {} cannot be weakly referenced, so must be "
+                                 "shared with a max_size. key: {}".format(factory, service_key))
+            self._instances = weakref.WeakValueDictionary()
+        else:
+            # least recently requested first
+            self._instances = collections.OrderedDict()
+
+    def instance(self, args, kwargs):
+        key = _args_key(args, kwargs)
+        if key is None:
+            # unhashable arguments cannot be compared, so are not shared
+            return _instantiate(self.service_key, self.factory, args, kwargs)
+        instances = self._instances
+        with self._lock:
+            instance = instances.get(key)
+            if instance is None:
+                instance = instances[key] = _instantiate(self.service_key, self.factory, args, kwargs)
+                max_size = self.spec.max_size
+                if max_size is not None and len(instances) > max_size:
+                    instances.popitem(last=False)
+            elif self.spec.max_size is not None:
+                # move to the end, as the most recently requested
+                del instances[key]
+                instances[key] = instance
+        return instance
+
+    def _after_fork(self, hook):
+        self._lock = threading.RLock()
+        if hook is not None:
+            for key, instance in self._instances.items():
+                self._instances[key] = hook(instance)
+
+
+_LIFETIMES = {
+    SINGLETON: _Singleton,
+    TRANSIENT: _Transient,
+    THREAD_LOCAL: _ThreadLocal,
+    CONTEXT_LOCAL: _ContextLocal,
+    POOLED: _Pool,
+    SHARED: _SharedByArgs,
+}
+
+# lifetimes configured by an object, rather than named
+_LIFETIME_SPECS = {
+    Pooled: _Pool,
+    Shared: _SharedByArgs,
+}
+
+
+def _make_lifetime(lifetime, service_key, factory):
+    """
+    Build the lifetime named by `lifetime`, or configured by it, for the service
+    class `factory`
+    """
+    lifetime_class = _LIFETIME_SPECS.get(type(lifetime))
+    if lifetime_class is not None:
+        return lifetime_class(service_key, factory, lifetime)
+    return _LIFETIMES[lifetime](service_key, factory)
+
+
+def _deref(item):
+    """
+    Return the referent of `item` if it is a weak reference, or else `item`
+    """
+    if isinstance(item, weakref.ref):
+        return item()
+    return item
+
+
+def _implements_bindee(service, bindee):
+    """
+    Determine whether `service` is, or is implemented in, the `bindee` of a
+    binding. `bindee` may be a dotted module or class name, a class or an instance.
+    `service` may also be an import path, which is only compared with names.
+    """
+    if _is_import_path(service):
+        module, _, name = service.partition(":")
+        return bindee == module or bindee == "{}.{}".format(module, name)
+    service_cls = service if inspect.isclass(service) else service.__class__
+    if isinstance(bindee, basestring):
+        module = service_cls.__module__
+        return bindee == module or bindee == "{}.{}".format(module, service_cls.__name__)
+    if bindee is None:
+        return False
+    if not inspect.isclass(bindee):
+        bindee = bindee.__class__
+    return issubclass(service_cls, bindee)
+
+
+#
+# Services may be registered by import path - "package.module:Class" - in which
+# case the import is deferred until the service is first looked up.
+#
+_IMPORT_PATH = re.compile(r"^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$")
+
+def _is_import_path(service):
+    """
+    Determine whether `service` is an import path of the form "module:attribute"
+    """
+    return isinstance(service, basestring) and _IMPORT_PATH.match(service) is not None
+
+
+def _import_path(path):
+    """
+    Import the module named by the import `path` and return the attribute it names.
+
+    Raises
+    ------
+    ImportError
+        If the module cannot be imported or lacks the attribute.
+    """
+    module_name, _, attr = path.partition(":")
+    target = importlib.import_module(module_name)
+    for name in attr.split("."):
+        try:
+            target = getattr(target, name)
+        except AttributeError:
+            raise ImportError("cannot import name {} from {}".format(attr, module_name))
+    return target
+
+
+def _validate_import_path(path):
+    """
+    Check that the import `path` names an existing module which defines the
+    attribute, without importing it. The module is located on sys.path and,
+    if it is python source, parsed for top level definitions.
+
+    Raises
+    ------
+    ImportError
+        If the module cannot be found or does not define the attribute.
+    """
+    module_name, _, attr = path.partition(":")
+    name = attr.split(".")[0]
+    module = sys.modules.get(module_name)
+    if module is not None:
+        if not hasattr(module, name):
+            raise ImportError("cannot import name {} from {}".format(attr, module_name))
+        return
+    search_path = None
+    for part in module_name.split("."):
+        try:
+            handle, filename, description = imp.find_module(part, search_path)
+        except ImportError:
+            raise ImportError("No module named {}".format(module_name))
+        if handle:
+            handle.close()
+        search_path = [filename]
+    if description[2] == imp.PKG_DIRECTORY:
+        filename = os.path.join(filename, "__init__.py")
+    elif description[2] != imp.PY_SOURCE:
+        # compiled and builtin modules can only be inspected by importing them
+        return
+    with open(filename) as handle:
+        tree = ast.parse(handle.read(), filename)
+    names = _module_names(tree.body)
+    if names is None:
+        return
+    if name not in names:
+        raise ImportError("cannot import name {} from {}".format(attr, module_name))
+
+
+def _module_names(body, names=None):
+    """
+    Collect the names bound by the module level statements in `body`, including
+    those nested in compound statements such as `if` and `try`.
+
+    Returns
+    -------
+    set | None
+        The names, or None if the module may bind names which cannot be seen
+        without running it, as with star imports.
+    """
+    if names is None:
+        names = set()
+    for node in body:
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+            names.add(node.name)
+            continue
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    return None
+                names.add(alias.asname or alias.name.split(".")[0])
+            continue
+        if isinstance(node, ast.Exec):
+            return None
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, (ast.AugAssign, ast.For)):
+            targets = [node.target]
+        elif isinstance(node, ast.With):
+            targets = [node.optional_vars] if node.optional_vars is not None else []
+        else:
+            targets = []
+        for target in targets:
+            names.update(sub.id for sub in ast.walk(target) if isinstance(sub, ast.Name))
+        for field in ("body", "orelse", "finalbody"):
+            if _module_names(getattr(node, field, ()), names) is None:
+                return None
+        for handler in getattr(node, "handlers", ()):
+            if isinstance(handler.name, ast.Name):
+                names.add(handler.name.id)
+            if _module_names(handler.body, names) is None:
+                return None
+    return names
+
+
+def _service_path(service):
+    """
+    Determine the import path of the module level class `service`, of the form
+    "module:Class", or None if it has none.
+    """
+    module = getattr(service, "__module__", None)
+    name = getattr(service, "__name__", None)
+    if module and name and getattr(sys.modules.get(module), name, None) is service:
+        return "{}:{}".format(module, name)
+    return None
+
+
+def _toposort(graph):
+    """
+    Order the keys of a dependency `graph` such that each key follows its
+    dependencies.
+
+    Raises
+    ------
+    ValueError
+        If the graph contains a cycle.
+    """
+    order = []
+    remaining = dict((key, set(deps)) for key, deps in graph.iteritems())
+    while remaining:
+        ready = [key for key, deps in remaining.iteritems() if not deps]
+        if not ready:
+            raise ValueError("Cyclic service dependencies between: {}".format(remaining.keys()))
+        for key in ready:
+            del remaining[key]
+        for deps in remaining.itervalues():
+            deps.difference_update(ready)
+        order.extend(ready)
+    return order
+
+
+def _run_graph(graph, func, max_workers):
+    """
+    Invoke `func` on each key of the dependency `graph` using up to `max_workers`
+    threads, calling it on a key only once it has returned for all of the key's
+    dependencies. The first exception raised by `func` is reraised once the
+    threads have finished.
+    """
+    waiting = dict((key, len(deps)) for key, deps in graph.iteritems())
+    dependents = dict((key, []) for key in graph)
+    for key, deps in graph.iteritems():
+        for dep in deps:
+            dependents[dep].append(key)
+    todo = queue.Queue()
+    done = queue.Queue()
+
+    def worker():
+        while True:
+            key = todo.get()
+            if key is _DONE:
+                return
+            try:
+                func(key)
+                done.put((key, None))
+            except Exception as err:
+                done.put((key, err))
+
+    workers = [threading.Thread(target=worker) for _ in xrange(min(max_workers, len(graph)))]
+    for thread_ in workers:
+        thread_.daemon = True
+        thread_.start()
+    pending = 0
+    for key, count in waiting.iteritems():
+        if count == 0:
+            todo.put(key)
+            pending += 1
+    error = None
+    while pending:
+        key, err = done.get()
+        pending -= 1
+        if err is not None:
+            error = error or err
+            continue
+        if error is not None:
+            continue
+        for dependent in dependents[key]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                todo.put(dependent)
+                pending += 1
+    for _ in workers:
+        todo.put(_DONE)
+    for thread_ in workers:
+        thread_.join()
+    if error is not None:
+        raise error
+
+# sentinel telling _run_graph workers to exit
+_DONE = object()
+
+class _FrozenDict(dict):
+    """
+    A dict which refuses modification, for the snapshots of a sealed ServiceLocator
+    """
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("The registry of a sealed ServiceLocator is immutable")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+
+
+#
+# _LOCATORS holds every ServiceLocator, so that after_fork can reinitialize them
+#
+_LOCATORS = weakref.WeakSet()
+
+
 class ServiceLocator(object):
     """
     Class which tracks services. A service may be a python instance
     or class by default. However this is influenced by configuration options.
-    """
-    # todo - move to instance variables. module instantiation enforces singleton
-    # store services
-    _services = {}
-    # store service requests
-    _bindings = []
 
-    def __init__(self, key_is_superclass=False, allow_instances=True):
+    Each ServiceLocator has its own registry, bindings and lock, so separate
+    instances neither share services nor contend with one another. The module
+    level SERVICE_LOCATOR is the instance used by the module functions.
+    """
+    def __init__(self, key_is_superclass=False, allow_instances=True,
+                 cache_proxy_methods=False, validate_import_paths=False,
+                 hierarchical_lookup=False):
         """
         If key_is_superclass is True, then we require the key to be
         the superclass of the service. This promotes SOLID design
         by requiring the dependence on an interface for a service
+
+        If cache_proxy_methods is True, ServiceProxy instances which have not
+        been told otherwise cache the bound methods of their resolved service,
+        taking themselves out of the call path for subsequent method calls.
+
+        If validate_import_paths is True, services registered by import path
+        are checked to exist when registered, without being imported.
+
+        If hierarchical_lookup is True, a class key which has not been registered
+        is resolved against the registered class keys: first a registered subclass
+        of it, then a registered base class whose service satisfies it. The result
+        is remembered until the next registration.
         """
         self.key_is_superclass = key_is_superclass
         self.allow_instances = allow_instances
+        self.cache_proxy_methods = cache_proxy_methods
+        self.validate_import_paths = validate_import_paths
+        self.hierarchical_lookup = hierarchical_lookup
+        # serializes writes to the registry and bindings
+        self._lock = threading.RLock() if thread else _NullLock()
+        # one lock per service key, used to make sure that a proxy's service is
+        # instantiated exactly once. Resolution of different keys does not contend,
+        # and none of it touches _lock
+        self._resolve_locks = {}
+        # store services. This dict is an immutable snapshot - it is replaced, never
+        # mutated, by register, which is what allows reads to skip the lock
+        self._services = {}
+        # the snapshot read by lookups: _services plus keys resolved through the
+        # class hierarchy, as { key : service }, and the latter as { key : registered key }.
+        # Both are reset on registration
+        self._lookup = self._services
+        self._aliases = {}
+        # store the lifetimes of services registered with one. Also a snapshot
+        self._lifetimes = {}
+        # store services registered by import path and not yet imported, as
+        # { key : (path, lifetime) }. Also a snapshot
+        self._lazy = {}
+        # store every service registered under each key, in order of registration,
+        # as { key : (service or import path, ...) }. Also a snapshot
+        self._members = {}
+        # the services of _members, once imported, as { key : (service, ...) }.
+        # Built on demand, and discarded when the key is registered again
+        self._collections = {}
+        # store service requests, indexed by key and deduplicated by bindee:
+        # { key : OrderedDict(bindee identity : ServiceBinding) }
+        self._bindings = {}
+        # keys which have been bound but not registered, and a count of their bindings
+        self._unbound = set()
+        self._unbound_count = 0
+        # (key, bindee identity) pairs of bindings whose bindee has been garbage
+        # collected. Weakref callbacks queue these, to be purged under the lock
+        self._dead_bindings = []
+        # hooks run in forked children, as { key : callable }. Also a snapshot
+        self._fork_hooks = {}
+        # proxies holding an instance of a service with a fork hook, as
+        # { key : WeakSet(ServiceProxy) }
+        self._fork_proxies = {}
+        # whether the registry has been sealed, and may no longer change
+        self._sealed = False
+        # bumped by every registration. Proxies compare it with the value they
+        # resolved their service at, and only on a mismatch consult _generations,
+        # the value of _generation when each key was last registered. Also a snapshot
+        self._generation = 0
+        self._generations = {}
+        # proxies which have cached methods of their service, as
+        # { key : WeakSet(ServiceProxy) }, so that registration can discard them
+        self._caching_proxies = {}
+        # the _Injectors of functions decorated by inject, resolved on sealing
+        self._injectors = weakref.WeakSet()
+        _LOCATORS.add(self)
 
     @classmethod
     def init_from_kwargs(cls, **kwargs):
@@ -125,7 +1237,7 @@ class ServiceLocator(object):
         """
         configure the service locator via kwargs
         """
-        for arg in (x for x in inspect.getargspec(ServiceLocator.__init__).args if x != "self"):
+        for arg in (x for x in inspect.getargspec(self.__init__).args if x != "self"):
             try:
                 if kwargs.has_key(arg):
                     setattr(self, arg, kwargs.get(arg))
@@ -134,7 +1246,7 @@ class ServiceLocator(object):
         #self.key_is_superclass = kwargs.get("key_is_superclass", self.key_is_superclass)
         return self
 
-    def register(self, key, service):
+    def register(self, key, service, lifetime=None, multiple=False, fork_hook=None):
         """
         Register a service with the ServiceLocator.
 
@@ -145,6 +1257,37 @@ class ServiceLocator(object):
             only restriction is that the key must be hashable, athough it is typically
             a string. Alternatively, if `key_is_superclass()` has been invoked during setup,
             one expects a superclass of the service, and ideally an abstract class at that.
+        service : class | instance | str
+            The service. A string of the form "package.module:Class" is an import
+            path. The import, and the checks below, are deferred until the service is
+            first looked up, unless `validate_import_paths` is configured, in which case
+            the path is checked (without importing) right away.
+        lifetime : SINGLETON | TRANSIENT | THREAD_LOCAL | CONTEXT_LOCAL | POOLED | Pooled | SHARED | Shared | None
+            How instances of a service class are shared. SINGLETON shares one instance
+            between all consumers, TRANSIENT builds a new instance whenever one is
+            requested, THREAD_LOCAL keeps one instance per thread and CONTEXT_LOCAL
+            one per contextvars context (or greenlet). Instances are built with the
+            constructor arguments of the consumer which first needs one. POOLED, or
+            a `Pooled` configuration, keeps a pool of instances, each used by one
+            consumer at a time via `checkout`. SHARED, or a `Shared` configuration,
+            shares one instance between the consumers which supply equal
+            constructor arguments. If None, each ServiceProxy builds its own
+            instance.
+        multiple : bool
+            Whether to add `service` to those already registered under `key`, rather
+            than replace them. Every service registered under a key is retrieved, in
+            order of registration, via `collection`. Lookups of a single service
+            retrieve the last registered.
+        fork_hook : callable | None
+            Called by `after_fork`, in a forked child, with each instance of the
+            service built in the parent. It returns the instance for the child to
+            use in its place: the same one, having reopened its connections, or a
+            new one. Instances kept per thread or per context are dropped instead,
+            to be rebuilt on demand.
+
+        Registering a key which is already registered swaps its service: proxies
+        which have resolved the previous service notice on their next access, and
+        resolve again.
 
         Raises
         ------
@@ -153,61 +1296,712 @@ class ServiceLocator(object):
             either an instance or subclass of `key`.
         TypeError
             If the key supplied is not hashable.
+        ValueError
+            If `lifetime` is unknown, or supplied along with a service which is
+            not a class, or is SHARED and instances of the class cannot be weakly
+            referenced.
+        ImportError
+            If `validate_import_paths` is configured, and the import path supplied
+            as `service` does not name an existing module attribute.
+        RuntimeError
+            If the ServiceLocator has been sealed.
         """
-        with LockCM() as lock:
-            if self.key_is_superclass:
-                if inspect.isclass(key):
-                    keyname = key.__name__
+        if lifetime is not None and type(lifetime) not in _LIFETIME_SPECS and lifetime not in _LIFETIMES:
+            raise ValueError("Unknown service lifetime: {}".format(lifetime))
+        is_path = _is_import_path(service)
+        if is_path and self.validate_import_paths:
+            _validate_import_path(service)
+        # a single hold of the lock, so that concurrent registrations of a key do not
+        # interleave, and readers see the service no sooner than its generation
+        with LockCM(self._lock) as lock:
+            self._check_unsealed(key)
+            if is_path:
+                self._register_path(key, service, lifetime)
+            else:
+                self._register_service(key, service, lifetime)
+            members = self._members.get(key, ()) if multiple else ()
+            all_members = dict(self._members)
+            all_members[key] = members + (service,)
+            self._members = all_members
+            if key in self._collections:
+                collections_ = dict(self._collections)
+                del collections_[key]
+                self._collections = collections_
+            if fork_hook is not None or key in self._fork_hooks:
+                fork_hooks = dict(self._fork_hooks)
+                if fork_hook is None:
+                    del fork_hooks[key]
                 else:
-                    keyname = key.__class__.__name__
+                    fork_hooks[key] = fork_hook
+                self._fork_hooks = fork_hooks
+            # proxies read _generation before _generations, so publish the latter first.
+            # Both follow the services, so a proxy seeing a new service along with the
+            # previous generation merely resolves it again
+            generations = dict(self._generations)
+            generations[key] = self._generation + 1
+            self._generations = generations
+            self._generation += 1
+            if self.hierarchical_lookup:
+                # the keys resolved through the hierarchy may have changed too
+                caching_proxies = self._caching_proxies.values()
+                self._caching_proxies = {}
+            else:
+                caching_proxies = [self._caching_proxies.pop(key, ())]
+            for proxies in caching_proxies:
+                for proxy in list(proxies):
+                    # methods of the replaced service. The next lookup re-resolves
+                    proxy.__dict__.clear()
+
+    def export_registry(self):
+        """
+        Describe the configuration and registrations of this ServiceLocator, such
+        that `import_registry` can reproduce them in another process. Service
+        classes are described by their import path, so the description is cheap to
+        pickle and the worker imports the implementation itself. Instances are
+        included as they are, so must be picklable to be sent. Fork hooks are left
+        out.
+
+        Returns
+        -------
+        {"options": {str: object}, "services": [(key, service, lifetime, multiple),...]}
+            The configuration options, and the arguments of each `register` call.
+
+        Raises
+        ------
+        ValueError
+            If a service class has no import path, as is the case of classes which
+            are not defined at module level.
+        """
+        lifetime_names = dict((cls, name) for name, cls in _LIFETIMES.iteritems())
+        options = dict((arg, getattr(self, arg)) for arg in inspect.getargspec(self.__init__).args
+                       if arg != "self")
+        services = []
+        with LockCM(self._lock) as lock:
+            members = self._members
+            lifetimes = self._lifetimes
+            lazy = self._lazy
+        for key, registered in members.iteritems():
+            if key in lazy:
+                lifetime = lazy[key][1]
+            elif key in lifetimes:
+                lifetime = getattr(lifetimes[key], "spec", None) or \
+                    lifetime_names[type(lifetimes[key])]
+            else:
+                lifetime = None
+            for idx, service in enumerate(registered):
                 if inspect.isclass(service):
-                    assert issubclass(service, key), "{} must be a subclass of {}".format(service.__name__, keyname)
+                    path = _service_path(service)
+                    if path is None:
+                        raise ValueError("Service {} registered under {} has no import path"
+                                         .format(service, key))
+                    service = path
+                # the lifetime belongs to the last service registered under the key
+                services.append((key, service, lifetime if idx == len(registered) - 1 else None,
+                                 idx > 0))
+        return {"options": options, "services": services}
+
+    def import_registry(self, registry):
+        """
+        Configure this ServiceLocator and register its services as described by
+        `registry`, as returned by `export_registry`.
+        """
+        self.configure(**registry["options"])
+        for key, service, lifetime, multiple in registry["services"]:
+            self.register(key, service, lifetime, multiple)
+
+    def _check_unsealed(self, key):
+        """
+        Raise RuntimeError if the ServiceLocator is sealed. Must be called with the
+        lock held, as `seal` freezes the snapshots under it.
+        """
+        if self._sealed:
+            raise RuntimeError("Cannot register {}: the ServiceLocator is sealed".format(key))
+
+    def _check_service(self, key, service):
+        """
+        Check that `service` may be registered under `key`, given the configuration
+
+        Raises
+        ------
+        AssertionError
+            If `key_is_superclass()` has been invoked, and the service is not
+            either an instance or subclass of `key`.
+        KeyError
+            If instances are disallowed, and `service` is one.
+        """
+        if inspect.isclass(key):
+            keyname = key.__name__
+        else:
+            keyname = key.__class__.__name__
+        if self.key_is_superclass:
+            if inspect.isclass(service):
+                assert issubclass(service, key), "{} must be a subclass of {}".format(service.__name__, keyname)
+            else:
+                assert isinstance(service, key), "{} must be an instance of {}".format(service, keyname)
+        if not self.allow_instances:
+            if not inspect.isclass(service):
+                raise KeyError("ServiceLocator has been configured to disallow"
+                "registration of class instances: service: {} key: {}".format(service, keyname))
+
+    def _register_service(self, key, service, lifetime):
+        """
+        Register the class or instance `service` under `key`
+        """
+        if lifetime is not None:
+            if not inspect.isclass(service):
+                raise ValueError("A lifetime may only be supplied with a service class. "
+                                 "service: {} key: {}".format(service, key))
+        with LockCM(self._lock) as lock:
+            self._check_unsealed(key)
+            self._check_service(key, service)
+            lifetimes = dict(self._lifetimes)
+            if lifetime is None:
+                lifetimes.pop(key, None)
+            else:
+                lifetimes[key] = _make_lifetime(lifetime, key, service)
+            self._lifetimes = lifetimes
+            services = dict(self._services)
+            services[key] = service
+            self._publish_services(services)
+            if key in self._lazy:
+                lazy = dict(self._lazy)
+                del lazy[key]
+                self._lazy = lazy
+            self._mark_bound(key)
+
+    def _register_path(self, key, path, lifetime):
+        """
+        Register the service at import `path` under `key`, deferring its import.
+        Must be called with the lock held.
+        """
+        lazy = dict(self._lazy)
+        lazy[key] = (path, lifetime)
+        self._lazy = lazy
+        # lookups fall through to the import path once the key is gone. The
+        # snapshot is published regardless, discarding keys resolved through
+        # the class hierarchy, which may now resolve to the import path
+        services = dict(self._services)
+        services.pop(key, None)
+        self._publish_services(services)
+        if key in self._lifetimes:
+            lifetimes = dict(self._lifetimes)
+            del lifetimes[key]
+            self._lifetimes = lifetimes
+        self._mark_bound(key)
+
+    def _publish_services(self, services):
+        """
+        Swap in a new `services` snapshot, discarding keys resolved through the
+        class hierarchy. Must be called with the lock held.
+        """
+        self._services = services
+        self._lookup = services
+        self._aliases = {}
+
+    def _hierarchy_key(self, service_key, check_service=True):
+        """
+        Find the registered key which the class `service_key` resolves to through
+        the class hierarchy: the closest registered subclass of `service_key`, or
+        else the first registered base class in its MRO whose service is (or is an
+        instance of) a subclass of `service_key`. If `check_service` is False, the
+        latter is assumed rather than checked, which avoids importing services
+        registered by import path.
+
+        Returns
+        -------
+        Hashable | None
+            The registered key, or None if there is none.
+
+        Raises
+        ------
+        KeyError
+            If several registered subclasses are equally close to `service_key`.
+        """
+        if not inspect.isclass(service_key):
+            return None
+        keys = [key for key in self._services.keys() + self._lazy.keys() if inspect.isclass(key)]
+        distances = dict((key, inspect.getmro(key).index(service_key)) for key in keys
+                         if key is not service_key and issubclass(key, service_key))
+        if distances:
+            closest = min(distances.itervalues())
+            candidates = [key for key, distance in distances.iteritems() if distance == closest]
+            if len(candidates) > 1:
+                raise KeyError("Ambiguous service key {}. Candidates: {}".format(service_key, candidates))
+            return candidates[0]
+        registered = set(keys)
+        for base in inspect.getmro(service_key)[1:]:
+            if base in registered:
+                if not check_service:
+                    return base
+                service = self.service(base)
+                if inspect.isclass(service):
+                    satisfied = issubclass(service, service_key)
                 else:
-                    assert isinstance(service, key), "{} must be an instance of {}".format(service, keyname)
-            if not self.allow_instances:
-                if not inspect.isclass(service):
-                    raise KeyError("ServiceLocator has been configured to disallow"
-                    "registration of class instances: service: {} key: {}".format(service, keyname))
-            ServiceLocator._services[key] = service
+                    satisfied = isinstance(service, service_key)
+                if satisfied:
+                    return base
+        return None
 
-    @classmethod
-    def register_binding(cls, binding_key, bindee):
+    def _resolve_hierarchy(self, service_key):
+        """
+        Look up the service for the unregistered class `service_key` through the
+        class hierarchy, remembering the result in the lookup snapshot.
+
+        Raises
+        ------
+        KeyError
+            If `service_key` does not resolve to a registered key.
+        """
+        key = self._hierarchy_key(service_key)
+        if key is None:
+            raise KeyError(service_key)
+        service = self.service(key)
+        if self._sealed:
+            # the snapshots are frozen, so the result is not remembered
+            return service
+        with LockCM(self._lock) as lock:
+            # skip remembering the result if a registration has since intervened
+            if self._services.get(key) is service:
+                lookup = dict(self._lookup)
+                lookup[service_key] = service
+                aliases = dict(self._aliases)
+                aliases[service_key] = key
+                self._lookup = lookup
+                self._aliases = aliases
+        return service
+
+    def _unbound_keys(self):
+        """
+        Return the keys which have been bound but not registered. Must be called
+        with the lock held.
+        """
+        if not self.hierarchical_lookup:
+            return self._unbound
+        unbound = []
+        for key in self._unbound:
+            try:
+                if self._hierarchy_key(key, check_service=False) is None:
+                    unbound.append(key)
+            except KeyError:
+                unbound.append(key)
+        return unbound
+
+    def _mark_bound(self, key):
+        """
+        Account for the bindings of `key` no longer being unbound. Must be called
+        with the lock held.
+        """
+        self._purge_dead_bindings()
+        if key in self._unbound:
+            self._unbound.discard(key)
+            self._unbound_count -= len(self._bindings[key])
+
+    def _import_service(self, service_key):
+        """
+        Import the service registered under `service_key` by import path, and
+        register it in place of the path.
+
+        Raises
+        ------
+        KeyError
+            If no service is associated with the supplied `service_key`
+        ImportError
+            If the import fails
+        """
+        lazy = self._lazy.get(service_key)
+        if lazy is None:
+            # imported, or registered anew, since the lookup
+            return self.service(service_key)
+        path, lifetime = lazy
+        # import without the lock, which the imported module may need to register
+        service = _import_path(path)
+        with LockCM(self._lock) as lock:
+            # a thread which imported first, or a registration which landed during
+            # the import, wins. Registering again would replace its lifetime
+            if self._lazy.get(service_key) is lazy:
+                self._register_service(service_key, service, lifetime)
+                return service
+        return self.service(service_key)
+
+    def _resolve_lock(self, service_key):
+        """
+        Retrieve the lock guarding resolution of proxies for `service_key`,
+        creating it if need be.
+        """
+        if not thread:
+            return _NullLock()
+        lock = self._resolve_locks.get(service_key)
+        if lock is None:
+            # setdefault is atomic, so racing threads agree on a single lock
+            lock = self._resolve_locks.setdefault(service_key, threading.RLock())
+        return lock
+
+    def register_binding(self, binding_key, bindee, proxy=None):
         """
         register service bindings on declaration. This is used to determine whether
-        the service_locator is correctly configured
+        the service_locator is correctly configured, and, along with the optional
+        `proxy` handed to the bindee, to work out and warm up service dependencies.
+
+        A binding is recorded once per key and bindee, however many proxies the
+        bindee requests. Bindings of bindees which are garbage collected are dropped.
         """
+        dead_bindings = self._dead_bindings
+        if type(bindee) is str:
+            # bindees are mostly module and class names, repeated across bindings
+            bindee = intern(bindee)
         try:
             # this implies that the bindee is an instance. This could present a problem
             # for validation, as registration wouldn't necessarily be happening up front.
-            bindee_ref = weakref.ref(bindee)
-        except Exception:
+            ident = id(bindee)
+            bindee_ref = weakref.ref(bindee, lambda ref: dead_bindings.append((binding_key, ident)))
+        except TypeError:
+            ident = bindee if isinstance(bindee, collections.Hashable) else id(bindee)
             bindee_ref = bindee
-        if inspect.isclass(binding_key):
-            ServiceLocator._bindings.append(ServiceBinding(binding_key, bindee_ref))
+        with LockCM(self._lock) as lock:
+            self._purge_dead_bindings()
+            bindings = self._bindings.get(binding_key)
+            if bindings is None:
+                bindings = self._bindings[binding_key] = collections.OrderedDict()
+            binding = bindings.get(ident)
+            if binding is not None:
+                if proxy is not None and binding.proxy is None:
+                    # keep a live proxy around for warm_up
+                    bindings[ident] = ServiceBinding(binding_key, binding.bindee, proxy)
+                return
+            bindings[ident] = ServiceBinding(binding_key, bindee_ref, proxy)
+            if binding_key not in self._services and binding_key not in self._lazy:
+                self._unbound.add(binding_key)
+                self._unbound_count += 1
+
+    def _purge_dead_bindings(self):
+        """
+        Drop bindings whose bindee has been garbage collected. Must be called with
+        the lock held.
+        """
+        while self._dead_bindings:
+            binding_key, ident = self._dead_bindings.pop()
+            bindings = self._bindings.get(binding_key)
+            if bindings is None or bindings.pop(ident, None) is None:
+                continue
+            if binding_key in self._unbound:
+                self._unbound_count -= 1
+            if not bindings:
+                del self._bindings[binding_key]
+                self._unbound.discard(binding_key)
+
+    def bindings(self):
+        """
+        Return a list of the recorded ServiceBindings.
+        """
+        with LockCM(self._lock) as lock:
+            self._purge_dead_bindings()
+            return [binding for bindings in self._bindings.itervalues()
+                    for binding in bindings.itervalues()]
+
+    def unbound_count(self):
+        """
+        Return the number of recorded bindings which lack a registered service.
+        If this is > 0, there is an issue.
+        """
+        with LockCM(self._lock) as lock:
+            self._purge_dead_bindings()
+            if not self.hierarchical_lookup:
+                return self._unbound_count
+            return sum(len(self._bindings[key]) for key in self._unbound_keys())
+
+    def unbound_services(self):
+        """
+        validate that all of the services requested by consumers have been configured.
+
+        Returns
+        --------
+        [ServiceBinding] : A list of service bindings which lack registered services.
+                           If the length of validate's returned value is > 0, there is
+                           an issue.
+        """
+        # Registration detection works for service proxies created at the class and module
+        # level. It will not work in a proxy consumer's __init__, as this wont get called
+        # before getting the list of unbound services
+        with LockCM(self._lock) as lock:
+            self._purge_dead_bindings()
+            return [binding for key in self._unbound_keys()
+                    for binding in self._bindings[key].itervalues()]
+
+    def dependency_graph(self):
+        """
+        Build the graph of dependencies between services from the recorded bindings.
+        A service depends upon a key if its implementation - the registered class,
+        or the class of a registered instance - is the bindee of a binding for that
+        key, or lives in the module which is. Module level proxies are thereby
+        attributed to the services implemented alongside them.
+
+        Returns
+        -------
+        { Hashable : set(Hashable) }
+            Map from each registered or requested service key to the set of keys it
+            depends upon.
+        """
+        services = dict(self._services)
+        services.update((key, lazy[0]) for key, lazy in self._lazy.iteritems())
+        graph = dict((key, set()) for key in services)
+        for binding in self.bindings():
+            bind_key = binding.bind_key
+            graph.setdefault(bind_key, set())
+            bindee = _deref(binding.bindee)
+            for key, service in services.iteritems():
+                if key != bind_key and _implements_bindee(service, bindee):
+                    graph[key].add(bind_key)
+        return graph
+
+    def warm_up(self, max_workers=4, service_keys=None):
+        """
+        Resolve service proxies ahead of first use, in dependency order, so that the
+        cost of building services is paid up front rather than by the first request.
+        Services which do not depend upon one another are built concurrently by up
+        to `max_workers` threads.
+
+        Only proxies which share their service are resolved: those for services
+        registered as instances, without a lifetime, or as SINGLETONs. Furthermore,
+        a proxy for a service class must have been handed its constructor arguments
+        (eg `get_service_proxy(BaseLogger, __name__)(__name__)`), as those of a proxy
+        which has not may yet be supplied, as with `Dioculator.frombulator_cls`.
+
+        Parameters
+        ----------
+        max_workers : int
+            Maximum number of threads to build services with.
+        service_keys : [Hashable] | None
+            Only build the services under these keys, and those they depend upon.
+            If None, build every service.
+
+        Raises
+        ------
+        ValueError
+            If the service dependencies are cyclic.
+        KeyError
+            If a bound service has not been registered.
+        """
+        graph = self.dependency_graph()
+        if service_keys is not None:
+            wanted = set()
+            pending = list(service_keys)
+            while pending:
+                key = pending.pop()
+                if key not in wanted:
+                    wanted.add(key)
+                    pending.extend(graph.get(key, ()))
+            graph = dict((key, graph.get(key, set()) & wanted) for key in wanted)
+        _toposort(graph)
+        proxies = {}
+        for binding in self.bindings():
+            proxy = binding.proxy
+            key = binding.bind_key
+            lifetime = self._lifetimes.get(key)
+            if proxy is not None and proxy._warmable() and (lifetime is None or lifetime.shareable):
+                proxies.setdefault(key, []).append(proxy)
+
+        def build(key):
+            for proxy in proxies.get(key, ()):
+                proxy._resolve()
+
+        if max_workers <= 1 or not thread:
+            for key in _toposort(graph):
+                build(key)
         else:
-            ServiceLocator._bindings.append(ServiceBinding(weakref.ref(binding_key), bindee_ref))
+            _run_graph(graph, build, max_workers)
 
-    @classmethod
-    def unbound_services(cls):
+    def prefork(self, service_keys, max_workers=1):
+        """
+        Build the services under `service_keys`, and those they depend upon, before
+        forking worker processes. Workers then inherit the instances, sharing their
+        memory copy-on-write, rather than each building its own. This suits
+        expensive, immutable services. Services holding connections should instead
+        be left to each worker, or be given a `fork_hook`.
+
+        Proxies are resolved as by `warm_up`. SINGLETON services under
+        `service_keys` which no proxy has built are instantiated without arguments.
+
+        Parameters
+        ----------
+        service_keys : [Hashable]
+            The keys of the services to build.
+        max_workers : int
+            Maximum number of threads to build services with. The threads have
+            exited by the time this returns.
+
+        Raises
+        ------
+        ValueError
+            If the service dependencies are cyclic.
+        KeyError
+            If a service has not been registered.
+        """
+        self.warm_up(max_workers, service_keys)
+        for key in service_keys:
+            self.service(key)
+            lifetime = self.lifetime(key)
+            if isinstance(lifetime, _Singleton):
+                lifetime.instance((), _NO_KWARGS)
+
+    def _bindee_of(self, proxy):
+        """
+        Find the bindee `proxy` was handed to, or None if it was not recorded
+        """
+        with LockCM(self._lock) as lock:
+            bindings = self._bindings.get(proxy._service_key, {}).values()
+        for binding in bindings:
+            if binding.proxy is proxy:
+                return _deref(binding.bindee)
+        return None
+
+    def _track_caching_proxy(self, proxy):
+        """
+        Remember that `proxy` caches methods of its service
+        """
+        with LockCM(self._lock) as lock:
+            proxies = self._caching_proxies.get(proxy._service_key)
+            if proxies is None:
+                proxies = self._caching_proxies[proxy._service_key] = weakref.WeakSet()
+            proxies.add(proxy)
+
+    def _track_fork_proxy(self, proxy):
         """
-        validate that all of the services requested by consumers have been configured.
+        Remember that `proxy` holds an instance of a service with a fork hook
+        """
+        key = self._aliases.get(proxy._service_key, proxy._service_key)
+        with LockCM(self._lock) as lock:
+            proxies = self._fork_proxies.get(key)
+            if proxies is None:
+                proxies = self._fork_proxies[key] = weakref.WeakSet()
+            proxies.add(proxy)
+
+    def _after_fork(self):
+        """
+        Reinitialize the locks of this ServiceLocator in a forked child, where
+        they may have been held by threads which did not survive the fork, and run
+        the fork hooks of its services. See `after_fork`.
+        """
+        self._lock = threading.RLock()
+        self._resolve_locks = {}
+        for injector in list(self._injectors):
+            injector.lock = threading.RLock()
+        fork_hooks = self._fork_hooks
+        # instances shared by several holders are passed through their hook once
+        replaced = {}
+
+        def replacer(key):
+            hook = fork_hooks.get(key)
+            if hook is None:
+                return None
+
+            def replace(instance):
+                try:
+                    return replaced[id(instance)][1]
+                except KeyError:
+                    replacement = hook(instance)
+                    replaced[id(instance)] = (instance, replacement)
+                    return replacement
+            return replace
+
+        for key, lifetime in self._lifetimes.iteritems():
+            lifetime._after_fork(replacer(key))
+        services = dict(self._services)
+        lookup = dict(self._lookup)
+        members = dict(self._members)
+        collections_ = dict(self._collections)
+
+        def replace_instances(replace, services):
+            return tuple(service if inspect.isclass(service) or _is_import_path(service)
+                         else replace(service) for service in services)
+
+        for key in fork_hooks:
+            replace = replacer(key)
+            service = services.get(key)
+            if service is not None and not inspect.isclass(service):
+                services[key] = lookup[key] = replace(service)
+                for alias, aliased in self._aliases.iteritems():
+                    if aliased == key:
+                        lookup[alias] = services[key]
+            members[key] = replace_instances(replace, members.get(key, ()))
+            if key in collections_:
+                collections_[key] = replace_instances(replace, collections_[key])
+            for proxy in list(self._fork_proxies.get(key, ())):
+                if proxy._service is not None:
+                    proxy._service = replace(proxy._service)
+                    # drop methods bound to the parent's instance
+                    proxy.__dict__.clear()
+        self._services = services
+        self._lookup = lookup
+        self._members = members
+        self._collections = collections_
+        if self._sealed:
+            self._freeze()
+
+    def seal(self):
+        """
+        Validate the registry and freeze it for the rest of the process's life.
+        Services registered by import path are imported, and the collections of
+        keys with several services built, so that every lookup after sealing is
+        a hit in an immutable snapshot, and never takes the lock. Proxies for
+        registered instances skip their resolution lock too, there being nothing
+        to build.
 
-        Returns
-        --------
-        [ServiceBinding] : A list of service bindings which lack registered services.
-                           If the length of validate's returned value is > 0, there is
-                           an issue.
+        This is meant to be called once registration is complete, in place of
+        checking `unbound_services` at startup. The dependencies of functions
+        decorated by `inject` are resolved as well, ahead of their first call.
+
+        Raises
+        ------
+        KeyError
+            If a bound service has not been registered. The ServiceLocator is then
+            left unsealed.
+        ImportError
+            If a service was registered by import path, and the import fails
+        AssertionError
+            If a service was registered by import path, and the imported service
+            fails the `key_is_superclass` check
         """
-        # Registration detection works for service proxies created at the class and module
-        # level. It will not work in a proxy consumer's __init__, as this wont get called
-        # before getting the list of unbound services
-        def is_registered(item):
-            return cls._services.has_key(item.bind_key)
+        # imports happen outside of the lock, as they may record bindings
+        for key in self._lazy.keys():
+            self.service(key)
+        for key in self._members.keys():
+            self.collection(key)
+        with LockCM(self._lock) as lock:
+            unbound = self.unbound_services()
+            if unbound:
+                raise KeyError("Cannot seal the ServiceLocator. Unbound services: {}".format(unbound))
+            if self.hierarchical_lookup:
+                # remember the keys which the bindings resolve through the hierarchy
+                for key in self._bindings.keys():
+                    self.service(key)
+            self._sealed = True
+            self._freeze()
+        for injector in list(self._injectors):
+            injector.resolve()
+
+    def _freeze(self):
+        """
+        Replace the snapshots of a sealed ServiceLocator with immutable copies.
+        Must be called with the lock held.
+        """
+        if self._lookup is self._services:
+            self._services = self._lookup = _FrozenDict(self._services)
+        else:
+            self._services = _FrozenDict(self._services)
+            self._lookup = _FrozenDict(self._lookup)
+        self._aliases = _FrozenDict(self._aliases)
+        self._lifetimes = _FrozenDict(self._lifetimes)
+        self._lazy = _FrozenDict(self._lazy)
+        self._members = _FrozenDict(self._members)
+        self._collections = _FrozenDict(self._collections)
+        self._fork_hooks = _FrozenDict(self._fork_hooks)
 
-        return [x for x in cls._bindings if not is_registered(x)]
+    @property
+    def sealed(self):
+        """whether the ServiceLocator has been sealed. See `seal`"""
+        return self._sealed
 
-    @classmethod
-    def has_service(cls, service_key):
+    def has_service(self, service_key):
         """
         Tests whether the ServiceLocator has the specified `service_key`.
 
@@ -223,12 +2017,17 @@ class ServiceLocator(object):
         TypeError
             If `service_key` is unhashable.
         """
-        with LockCM() as lock:
-            return cls._services.has_key(service_key)
-
+        # no lock required. _lookup is a snapshot which is replaced, not mutated
+        if self._lookup.has_key(service_key) or self._lazy.has_key(service_key):
+            return True
+        if self.hierarchical_lookup:
+            try:
+                return self._hierarchy_key(service_key) is not None
+            except KeyError:
+                return False
+        return False
 
-    @classmethod
-    def service(cls, service_key):
+    def service(self, service_key):
         """
         Given a potential service key, return the service associated with it.
 
@@ -242,20 +2041,221 @@ class ServiceLocator(object):
         Service
             The previously registered service associated with the supplied `service_key`.
 
+        If `hierarchical_lookup` is configured, a class key which has not been
+        registered resolves to the service of a registered subclass or base class.
+
         Raises
         ------
         KeyError
             If no service is associated with the supplied `service_key`
         TypeError
             If the supplied `service_key` is unhashable
+        ImportError
+            If the service was registered by import path, and the import fails
+        AssertionError
+            If the service was registered by import path, and the imported service
+            fails the `key_is_superclass` check
+        """
+        metrics = _METRICS
+        if metrics is not None:
+            metrics.record(Metrics.LOOKUP, service_key, 1)
+        # no lock required. _lookup is a snapshot which is replaced, not mutated
+        try:
+            return self._lookup[service_key]
+        except KeyError:
+            if service_key in self._lazy:
+                return self._import_service(service_key)
+            if not self.hierarchical_lookup:
+                raise
+        return self._resolve_hierarchy(service_key)
+
+    def lifetime(self, service_key):
+        """
+        Retrieve the lifetime a service was registered with, or None if it was
+        registered without one.
+        """
+        return self._lifetimes.get(self._aliases.get(service_key, service_key))
+
+    def instance(self, service_key, *args, **kwargs):
+        """
+        Retrieve an instance of the service associated with `service_key`, honoring
+        the lifetime the service was registered with. `args` and `kwargs` are passed
+        to the service class if an instance must be built. A service registered
+        without a lifetime is returned as is if it is an instance, and instantiated
+        anew if it is a class.
+
+        Raises
+        ------
+        KeyError
+            If no service is associated with the supplied `service_key`
         """
-        with LockCM() as lock:
-            return cls._services[service_key]
+        lifetime = self._lifetimes.get(service_key)
+        if lifetime is None:
+            service = self.service(service_key)
+            # a service registered by import path only has its lifetime once imported,
+            # and one resolved through the class hierarchy has that of another key
+            lifetime = self.lifetime(service_key)
+            if lifetime is None:
+                if inspect.isclass(service):
+                    return _instantiate(service_key, service, args, kwargs)
+                return service
+        return lifetime.instance(args, kwargs)
 
+    def collection(self, service_key):
+        """
+        Retrieve every service registered under `service_key`, in order of
+        registration. Services registered by import path are imported the first
+        time the collection is retrieved. The collection is then kept until the key
+        is registered again, so repeated retrieval neither allocates nor locks.
 
+        Returns
+        -------
+        ( Service,... )
+            The services registered under `service_key`. Empty if there are none.
 
-    @classmethod
-    def services(cls):
+        Raises
+        ------
+        ImportError
+            If a service was registered by import path, and the import fails
+        AssertionError
+            If a service was registered by import path, and the imported service
+            fails the `key_is_superclass` check
+        """
+        # no lock required. _collections is a snapshot which is replaced, not mutated
+        try:
+            return self._collections[service_key]
+        except KeyError:
+            pass
+        members = self._members.get(service_key, ())
+        services = []
+        for member in members:
+            if _is_import_path(member):
+                # import outside of the lock, as imports may record bindings
+                member = _import_path(member)
+                self._check_service(service_key, member)
+            services.append(member)
+        services = tuple(services)
+        if self._sealed:
+            return services
+        with LockCM(self._lock) as lock:
+            # skip storing the collection if a registration has since intervened
+            if self._members.get(service_key, ()) is members:
+                collections_ = dict(self._collections)
+                collections_[service_key] = services
+                self._collections = collections_
+        return services
+
+    def _pool(self, service_key):
+        """
+        Retrieve the pool of the service registered under `service_key`
+
+        Raises
+        ------
+        KeyError
+            If no service is associated with the supplied `service_key`
+        TypeError
+            If the service was not registered with a pooled lifetime
+        """
+        self.service(service_key)
+        lifetime = self.lifetime(service_key)
+        if not isinstance(lifetime, _Pool):
+            raise TypeError("Service {} is not pooled".format(service_key))
+        return lifetime
+
+    def checkout(self, service_key, block=True, timeout=None):
+        """
+        Check out an instance of a pooled service for the duration of a with block,
+        at the end of which it is returned to the pool:
+
+            with locator.checkout(BaseDatabase) as database:
+                database.query(...)
+
+        Parameters
+        ----------
+        service_key : Hashable
+            The key of a service registered with a POOLED or `Pooled` lifetime.
+        block : bool
+            Whether to wait for an instance when all are checked out and the pool is
+            full.
+        timeout : number | None
+            Maximum number of seconds to wait. If None, wait indefinitely.
+
+        Returns
+        -------
+        Context Manager
+            Which checks out an instance on entry, and returns it on exit.
+
+        Raises
+        ------
+        KeyError
+            If no service is associated with the supplied `service_key`
+        TypeError
+            If the service was not registered with a pooled lifetime
+        queue.Empty
+            On entry, if no instance is available in time.
+        """
+        return self._pool(service_key).checkout(block, timeout)
+
+    def pool_stats(self, service_key):
+        """
+        Retrieve the statistics of the pool of a pooled service.
+
+        Returns
+        -------
+        {str : int}
+            size, idle, in_use, min_size and max_size, describing the pool now, and
+            running totals of checkouts, waits (for a returned instance), timeouts,
+            instances created, evicted (for being idle) and invalidated (by
+            `validate`).
+
+        Raises
+        ------
+        KeyError
+            If no service is associated with the supplied `service_key`
+        TypeError
+            If the service was not registered with a pooled lifetime
+        """
+        return self._pool(service_key).stats()
+
+    def get_service_proxy(self, service_key, bindee, cache_methods=None):
+        """
+        Retrieve a ServiceProxy which defers retrieval of the service associated
+        with `service_key` from this ServiceLocator until first use, and record
+        the binding of `bindee` to `service_key`. See `get_service_proxy`.
+        """
+        proxy = ServiceProxy(service_key, cache_methods, self)
+        self.register_binding(service_key, bindee, proxy)
+        return proxy
+
+    def inject(self, **dependencies):
+        """
+        Decorate a function, or method, to be passed services from this
+        ServiceLocator as keyword arguments. See `inject`.
+        """
+        def decorator(func):
+            injector = _Injector(self, dependencies)
+            bindee = "{}.{}".format(func.__module__, func.__name__)
+            for key in dependencies.itervalues():
+                self.register_binding(key, bindee)
+            with LockCM(self._lock) as lock:
+                self._injectors.add(injector)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                # read once, as other threads may publish a new state meanwhile
+                state = injector.state
+                if state is None or state[0] != self._generation or state[2]:
+                    resolved = injector.services()
+                else:
+                    resolved = state[1]
+                if kwargs:
+                    return func(*args, **dict(resolved, **kwargs))
+                return func(*args, **resolved)
+            wrapper._injector = injector
+            return wrapper
+        return decorator
+
+    def services(self):
         """
         Return a list of keys for registered services.
 
@@ -268,13 +2268,17 @@ class ServiceLocator(object):
         [ Hashable,... ]
             Shallow copy of the list of registered service keys.
         """
-        with LockCM() as lock:
-            return cls._services.keys()[:]
+        return self._services.keys() + [key for key in self._lazy if key not in self._services]
 
 
 SERVICE_LOCATOR = ServiceLocator()
 
 
+# shared stand ins for the arguments of proxies called without any
+_NO_KWARGS = {}
+_NO_CALL = ((), _NO_KWARGS)
+
+
 class ServiceProxy(object):
     """
     A ServiceProxy captures a service request but does not
@@ -283,8 +2287,37 @@ class ServiceProxy(object):
     get_service_proxy, making usage more ergonomic at the cost of
     a slight runtime penalty.
     This class should handle proxied instances as well as classes
+
+    The runtime penalty may be all but eliminated by caching methods. When
+    caching, each bound method of the resolved service is stored on the proxy
+    the first time it is looked up, so that later lookups are ordinary attribute
+    hits which never reach __getattr__. Only bound methods are cached; data
+    attributes are always forwarded, so they never go stale.
+
+    Proxies are numerous, so they are kept compact: attributes live in slots,
+    constructor arguments are only stored when there are some, and the __dict__
+    is only created to cache methods.
     """
-    def __init__(self, service_key):
+    __slots__ = (
+        "_service_key",
+        "_locator",
+        "_service",
+        "_lifetime",
+        # None until called, then (args, kwargs)
+        "_call",
+        "_cache_methods",
+        # the locator's _generation when the service was resolved
+        "_generation",
+        # the registered key the service was resolved from, which differs from
+        # _service_key when resolved through the class hierarchy
+        "_resolved_key",
+        # method cache
+        "__dict__",
+        # bindings refer to their proxy weakly
+        "__weakref__",
+    )
+
+    def __init__(self, service_key, cache_methods=None, locator=None):
         """
         Initialize a ServiceProxy with a service. The ServiceProxy's job is to
         defer reification of the proxied service until first use. This is primarily
@@ -297,29 +2330,370 @@ class ServiceProxy(object):
             The key expected to be registered with the ServiceLocator. This may be
             any hashable object, although typically, one expects either a string or
             an abstract class, depending upon the ServiceLocator setup.
+        cache_methods : bool | None
+            Whether to cache the bound methods of the resolved service on the proxy.
+            If None, the ServiceLocator's `cache_proxy_methods` setting, read when
+            the service is resolved, decides.
+        locator : ServiceLocator | None
+            The ServiceLocator to resolve the service from. Defaults to SERVICE_LOCATOR.
         """
         self._service_key = service_key
+        self._locator = SERVICE_LOCATOR if locator is None else locator
         self._service = None
-        self._args = []
-        self._kwargs = {}
+        self._lifetime = None
+        self._call = None
+        self._cache_methods = cache_methods
+        self._generation = None
+        self._resolved_key = None
 
     def __call__(self, *args, **kwargs):
-        self._args = args
-        self._kwargs = kwargs
+        if args or kwargs:
+            self._call = (args, kwargs or _NO_KWARGS)
+        else:
+            self._call = _NO_CALL
         return self
 
+    def __reduce__(self):
+        """
+        Pickle the proxy as its service key and constructor arguments, leaving out
+        the resolved service. The unpickled proxy resolves its service afresh, from
+        the SERVICE_LOCATOR of the unpickling process.
+        """
+        return (_unpickle_proxy, (self._service_key, self._cache_methods, self._call))
+
+    def _call_args(self):
+        """
+        Retrieve the (args, kwargs) the proxy was called with
+        """
+        return self._call or _NO_CALL
+
+    def _warmable(self):
+        """
+        Whether the proxy may be resolved ahead of first use. This requires that it
+        be unresolved, and that it not be waiting on constructor arguments.
+        """
+        if self._service is not None or self._lifetime is not None:
+            return False
+        try:
+            service = self._locator.service(self._service_key)
+        except KeyError:
+            # let resolution report the missing service
+            return True
+        return self._call is not None or not inspect.isclass(service)
+
     def __getattr__(self, name):
-        if self._service is None:
-            self._service = get_service(self._service_key)
-            if inspect.isclass(self._service):
-                self._service = self._service(*self._args, **self._kwargs)
-                # dont want to hang on to references and prevent
-                # garbage collection
-                del self._args
-                del self._kwargs
-        return getattr(self._service, name)
-
-def get_service_proxy(service_key, bindee):
+        service = self._service
+        if self._generation != self._locator._generation:
+            service = self._revalidate()
+        if service is None:
+            lifetime = self._lifetime
+            if lifetime is not None:
+                service = lifetime.instance(*self._call_args())
+            else:
+                service = self._resolve()
+        elif _METRICS is not None:
+            _METRICS.record(Metrics.RESOLVE_HIT, self._service_key, 1)
+        attr = getattr(service, name)
+        if self._cache_methods and getattr(attr, "__self__", None) is service:
+            # bound method of the service. Storing it on the proxy means
+            # __getattr__ is not consulted for `name` again
+            if not self.__dict__:
+                self._locator._track_caching_proxy(self)
+            self.__dict__[name] = attr
+        return attr
+
+    def _revalidate(self):
+        """
+        Check, once registrations have happened since the proxy resolved its
+        service, whether its key was among them. If so, the resolved service or
+        lifetime is dropped, to be resolved again.
+
+        Returns
+        -------
+        Service | None
+            The resolved service, or None if there is none.
+        """
+        locator = self._locator
+        generation = locator._generation
+        if self._generation is None:
+            return self._service
+        if self._is_stale(locator._generations):
+            with locator._resolve_lock(self._service_key):
+                if self._generation is not None and self._generation < generation:
+                    self._generation = None
+                    self._service = None
+                    self._lifetime = None
+                    self.__dict__.clear()
+            return self._service
+        self._generation = generation
+        return self._service
+
+    def _is_stale(self, generations):
+        """
+        Whether the resolved service is out of date, given the `generations` of
+        the registered keys: if the proxy's key, or the key it was resolved from,
+        has been registered since, or the class hierarchy now resolves the key to
+        another registered key.
+        """
+        key_generation = generations.get(self._service_key)
+        if key_generation is not None and key_generation > self._generation:
+            return True
+        resolved_key = self._resolved_key
+        if resolved_key is None:
+            return True
+        if resolved_key == self._service_key:
+            # a key resolved through the hierarchy without being remembered has no
+            # generation of its own, so cannot be vouched for
+            return key_generation is None
+        resolved_generation = generations.get(resolved_key)
+        if resolved_generation is None or resolved_generation > self._generation:
+            return True
+        try:
+            return self._locator._hierarchy_key(self._service_key) != resolved_key
+        except KeyError:
+            return True
+
+    def _resolve(self):
+        """
+        Resolve the service, recording a span for it if profiling is enabled.
+        See `_resolve_service`.
+        """
+        profiler = _PROFILER
+        if profiler is None or self._service is not None:
+            return self._resolve_service()
+        span = profiler.start(Profiler.RESOLVE, self._service_key, self._locator._bindee_of(self))
+        try:
+            return self._resolve_service()
+        finally:
+            profiler.finish(span)
+
+    def _resolve_service(self):
+        """
+        Fetch and, if it is a class, instantiate the proxied service. This happens
+        exactly once, even when several threads use a fresh proxy concurrently.
+        Only the first use pays for the per key lock.
+
+        A service registered with a lifetime which does not share a single instance
+        is never stored on the proxy. The proxy keeps the lifetime instead, and asks
+        it for the caller's instance on each access.
+
+        Once the ServiceLocator is sealed, a proxy for a registered instance skips
+        the lock, as there is nothing to build and its lookup cannot change.
+        """
+        locator = self._locator
+        if locator._sealed:
+            service = locator._lookup.get(self._service_key)
+            if service is not None and not inspect.isclass(service):
+                if _METRICS is not None:
+                    _METRICS.record(Metrics.RESOLVE_MISS, self._service_key, 1)
+                if self._cache_methods is None:
+                    self._cache_methods = locator.cache_proxy_methods
+                self._generation = locator._generation
+                self._resolved_key = self._service_key
+                self._service = service
+                if self._service_key in locator._fork_hooks:
+                    locator._track_fork_proxy(self)
+                return service
+        with self._locator._resolve_lock(self._service_key):
+            if self._lifetime is not None:
+                return self._lifetime.instance(*self._call_args())
+            if self._service is None:
+                if _METRICS is not None:
+                    _METRICS.record(Metrics.RESOLVE_MISS, self._service_key, 1)
+                args, kwargs = self._call_args()
+                # read before the lookup, so that a registration racing with it
+                # is noticed by the next access
+                generation = self._locator._generation
+                # look the service up first, as services registered by import path
+                # have no lifetime until imported
+                service = self._locator.service(self._service_key)
+                self._resolved_key = self._locator._aliases.get(self._service_key,
+                                                                self._service_key)
+                lifetime = self._locator.lifetime(self._service_key)
+                if lifetime is not None and not lifetime.shareable:
+                    # instances differ between callers, so bound methods may not be cached
+                    self._cache_methods = False
+                    self._generation = generation
+                    self._lifetime = lifetime
+                    return lifetime.instance(args, kwargs)
+                if lifetime is not None:
+                    service = lifetime.instance(args, kwargs)
+                else:
+                    if inspect.isclass(service):
+                        service = _instantiate(self._service_key, service, args, kwargs)
+                if self._cache_methods is None:
+                    self._cache_methods = self._locator.cache_proxy_methods
+                self._generation = generation
+                # publish last, so that threads on the lock free path never
+                # see a partially resolved proxy
+                self._service = service
+                if self._resolved_key in self._locator._fork_hooks:
+                    self._locator._track_fork_proxy(self)
+        return self._service
+
+class _Injector(object):
+    """
+    Resolves, and holds, the services passed to a function decorated by `inject`
+    """
+    __slots__ = ("locator", "dependencies", "state", "lock", "__weakref__")
+
+    def __init__(self, locator, dependencies):
+        self.locator = locator
+        # { argument name : service key }
+        self.dependencies = dependencies
+        # None until resolved, then (generation, resolved, per_call): the locator's
+        # _generation when the services were resolved, { argument name : service },
+        # and { argument name : service key } of the services whose lifetime does
+        # not share a single instance, so are resolved on each call, or None.
+        # Published as a whole, so that callers never see a mix of two resolutions
+        self.state = None
+        # serializes resolution, so that services are built once
+        self.lock = threading.RLock() if thread else _NullLock()
+
+    @property
+    def resolved(self):
+        """the services resolved once, or None if not resolved yet"""
+        state = self.state
+        return None if state is None else state[1]
+
+    def resolve(self):
+        """
+        Resolve the services, as by `ServiceLocator.instance`, and remember them
+        until the next registration
+        """
+        locator = self.locator
+        with self.lock:
+            generation = locator._generation
+            resolved = {}
+            per_call = {}
+            for name, key in self.dependencies.iteritems():
+                service = locator.service(key)
+                lifetime = locator.lifetime(key)
+                if lifetime is not None and not lifetime.shareable:
+                    per_call[name] = key
+                elif lifetime is not None:
+                    resolved[name] = lifetime.instance((), _NO_KWARGS)
+                elif inspect.isclass(service):
+                    resolved[name] = _instantiate(key, service, (), _NO_KWARGS)
+                else:
+                    resolved[name] = service
+            self.state = state = (generation, resolved, per_call or None)
+        return state
+
+    def services(self):
+        """
+        The services to pass to a call, resolving them if they have not been since
+        the last registration
+        """
+        state = self.state
+        if state is None or state[0] != self.locator._generation:
+            with self.lock:
+                # another thread may have resolved them while this one waited
+                state = self.state
+                if state is None or state[0] != self.locator._generation:
+                    state = self.resolve()
+        _, resolved, per_call = state
+        if per_call:
+            resolved = dict(resolved)
+            for name, key in per_call.iteritems():
+                resolved[name] = self.locator.instance(key)
+        return resolved
+
+class Inject(object):
+    """
+    A class attribute which resolves a service on first access, and then replaces
+    itself in the class __dict__ with the service. Later accesses are ordinary
+    attribute lookups, which involve neither a ServiceProxy nor the locator:
+
+        class Bla(object):
+            dioculator = Inject(BaseDioculator, args=("frombulator",))
+
+    The service is resolved as by `get_instance`: a registered instance as is, and
+    a registered class instantiated with `args` and `kwargs`, honoring its
+    lifetime. A service whose lifetime does not share a single instance is not
+    written through, but resolved on each access.
+
+    As the attribute is replaced, a service registered anew after the first access
+    is not picked up, unlike with a ServiceProxy.
+    """
+    def __init__(self, service_key, args=(), kwargs=None, locator=None, bindee=None):
+        """
+        Parameters
+        ----------
+        service_key : Hashable
+            The key of the service to resolve.
+        args : tuple
+            Positional arguments to instantiate a service class with.
+        kwargs : dict | None
+            Keyword arguments to instantiate a service class with.
+        locator : ServiceLocator | None
+            The ServiceLocator to resolve the service from. Defaults to SERVICE_LOCATOR.
+        bindee : object | None
+            The bindee to record the binding for. Defaults to the class whose body
+            the Inject is created in, as "module.Class", or else the module.
+        """
+        self.service_key = service_key
+        self.args = tuple(args)
+        self.kwargs = kwargs or _NO_KWARGS
+        self.locator = SERVICE_LOCATOR if locator is None else locator
+        if bindee is None:
+            caller = sys._getframe(1)
+            module = caller.f_locals.get("__module__")
+            if module is not None:
+                # a class body, whose code is named after the class
+                bindee = "{}.{}".format(module, caller.f_code.co_name)
+            else:
+                bindee = caller.f_globals.get("__name__")
+        self.bindee = bindee
+        self.locator.register_binding(service_key, bindee)
+        self._name = None
+
+    def _owner(self, owner):
+        """
+        find the class in the MRO of `owner` which holds this Inject, and the
+        name it is held under
+        """
+        for klass in inspect.getmro(owner):
+            if self._name is not None:
+                if vars(klass).get(self._name) is self:
+                    return klass, self._name
+                continue
+            for name, value in vars(klass).iteritems():
+                if value is self:
+                    self._name = name
+                    return klass, name
+        raise AttributeError("Inject for {} not found on {}".format(self.service_key, owner))
+
+    def __get__(self, instance, owner):
+        locator = self.locator
+        klass, name = self._owner(owner)
+        with locator._resolve_lock(self.service_key):
+            current = vars(klass).get(name)
+            if current is not self:
+                # another thread has written the service through
+                return current
+            profiler = _PROFILER
+            span = profiler.start(Profiler.RESOLVE, self.service_key, self.bindee) \
+                if profiler is not None else None
+            try:
+                service = locator.instance(self.service_key, *self.args, **self.kwargs)
+            finally:
+                if span is not None:
+                    profiler.finish(span)
+            lifetime = locator.lifetime(self.service_key)
+            if lifetime is None or lifetime.shareable:
+                setattr(klass, name, service)
+        return service
+
+def _unpickle_proxy(service_key, cache_methods, call):
+    """
+    Rebuild a pickled ServiceProxy. See `ServiceProxy.__reduce__`.
+    """
+    proxy = ServiceProxy(service_key, cache_methods)
+    proxy._call = call
+    return proxy
+
+def get_service_proxy(service_key, bindee, cache_methods=None):
     """
     Retrieve a ServiceProxy instance which defers retrieval of the requested
     service until first use.
@@ -336,6 +2710,11 @@ def get_service_proxy(service_key, bindee):
 
     bindee : string | class
         The entity which is requesting the service via the service key
+
+    cache_methods : bool | None
+        Whether the returned proxy caches the bound methods of the service once
+        resolved. Defaults to the ServiceLocator's `cache_proxy_methods` setting.
+
     Returns
     -------
     service
@@ -348,8 +2727,41 @@ def get_service_proxy(service_key, bindee):
     KeyError
         If a non-extant service_key is supplied
     """
-    SERVICE_LOCATOR.register_binding(service_key, bindee)
-    return ServiceProxy(service_key)
+    return SERVICE_LOCATOR.get_service_proxy(service_key, bindee, cache_methods)
+
+def inject(**dependencies):
+    """
+    Decorate a function, or method, to be passed services as keyword arguments:
+
+        @inject(logger=BaseLogger, dioculator=BaseDioculator)
+        def frombulate(widget, logger, dioculator):
+            ...
+
+    Each argument is passed the service registered under its key, as `get_instance`
+    would return it: a registered instance as is, and a registered class
+    instantiated without arguments, honoring its lifetime. The services are
+    resolved on the first call - so, as with proxies, registration may follow the
+    decoration - or when the ServiceLocator is sealed, and reused by later calls,
+    which pay for no lookup at all. Services whose lifetime does not share a single
+    instance are the exception, and resolved on each call. All are resolved again
+    after a registration, so that swapped services are passed. Keyword arguments
+    supplied by the caller take precedence.
+
+    The dependencies are recorded as bindings of the function, named as
+    "module.function", so that `unbound_services` reports any which are not
+    registered.
+
+    Parameters
+    ----------
+    dependencies : { str : Hashable }
+        The service key to pass as each keyword argument.
+
+    Returns
+    -------
+    callable
+        The decorator.
+    """
+    return SERVICE_LOCATOR.inject(**dependencies)
 
 def get_service(service_key):
     """
@@ -379,6 +2791,49 @@ def get_service(service_key):
     return SERVICE_LOCATOR.service(service_key)
 
 
+def get_services(service_key):
+    """
+    Retrieve every service registered under a key (see `register`'s `multiple`
+    argument), in order of registration. The returned tuple is built once, and
+    kept until the key is registered again.
+
+    Parameters
+    ----------
+    service_key : Hashable
+        The key the services are registered under.
+
+    Returns
+    -------
+    ( Service,... )
+        The services registered under `service_key`. Empty if there are none.
+    """
+    return SERVICE_LOCATOR.collection(service_key)
+
+
+def get_instance(service_key, *args, **kwargs):
+    """
+    Retrieve an instance of a service, honoring the lifetime it was registered with.
+
+    Parameters
+    ----------
+    service_key : Hashable
+        Retrieve a service associated with the supplied service key.
+    args, kwargs :
+        Passed to the service class, should an instance need to be built.
+
+    Returns
+    -------
+    service
+        An instance of the service associated with the service_key.
+
+    Raises
+    ------
+    KeyError
+        If a non-extant service_key is supplied
+    """
+    return SERVICE_LOCATOR.instance(service_key, *args, **kwargs)
+
+
 def services():
     """
     Return a list of keys for registered services.
@@ -394,7 +2849,7 @@ def services():
     """
     return SERVICE_LOCATOR.services()
 
-def register(key, service):
+def register(key, service, lifetime=None, multiple=False, fork_hook=None):
     """
     Register a `service` with the ServiceLocator with the associated `key`.
 
@@ -405,6 +2860,19 @@ def register(key, service):
         only restriction is that the key must be hashable, athough it is typically
         a string. Alternatively, if `key_is_superclass()` has been invoked during setup,
         one expects a superclass of the service, and ideally an abstract class at that.
+    service : class | instance | str
+        The service, or an import path of the form "package.module:Class", which is
+        imported when the service is first looked up.
+    lifetime : SINGLETON | TRANSIENT | THREAD_LOCAL | CONTEXT_LOCAL | POOLED | Pooled | SHARED | Shared | None
+        How instances of the service class are shared between consumers. If None,
+        each ServiceProxy builds its own instance. Pooled services are used via
+        `checkout`.
+    multiple : bool
+        Whether to add `service` to those already registered under `key`, rather
+        than replace them. See `get_services`.
+    fork_hook : callable | None
+        Called by `after_fork`, in a forked child, with each instance of the service
+        built in the parent, returning the instance for the child to use instead.
 
     Raises
     ------
@@ -413,8 +2881,25 @@ def register(key, service):
         either an instance or subclass of `key`.
     TypeError
         If the key supplied is not hashable.
+    ValueError
+        If `lifetime` is unknown, or supplied along with a service which is not a class.
+    ImportError
+        If `validate_import_paths` has been configured, and an import path supplied
+        as `service` does not name an existing module attribute.
     """
-    SERVICE_LOCATOR.register(key, service)
+    SERVICE_LOCATOR.register(key, service, lifetime, multiple, fork_hook)
+
+def seal():
+    """
+    Validate the registry and freeze it, such that lookups never take a lock and
+    further registration raises RuntimeError. See `ServiceLocator.seal`.
+
+    Raises
+    ------
+    KeyError
+        If a bound service has not been registered.
+    """
+    SERVICE_LOCATOR.seal()
 
 def unbound_services():
     """
@@ -422,6 +2907,162 @@ def unbound_services():
     """
     return SERVICE_LOCATOR.unbound_services()
 
+def dependency_graph():
+    """
+    Retrieve the graph of dependencies between services, as a map from each
+    service key to the set of service keys it depends upon.
+    """
+    return SERVICE_LOCATOR.dependency_graph()
+
+def warm_up(max_workers=4):
+    """
+    Resolve service proxies ahead of first use, in dependency order, building
+    independent services concurrently. This is best called after registration
+    and validation via `unbound_services`, before taking traffic.
+
+    Parameters
+    ----------
+    max_workers : int
+        Maximum number of threads to build services with.
+
+    Raises
+    ------
+    ValueError
+        If the service dependencies are cyclic.
+    KeyError
+        If a bound service has not been registered.
+    """
+    SERVICE_LOCATOR.warm_up(max_workers)
+
+def prefork(service_keys, max_workers=1):
+    """
+    Build the services under `service_keys`, and those they depend upon, before
+    forking worker processes, so that the workers inherit them rather than each
+    building its own. See `ServiceLocator.prefork`.
+    """
+    SERVICE_LOCATOR.prefork(service_keys, max_workers)
+
+def after_fork():
+    """
+    Prepare the service locator for use in a forked child process. The locks of
+    every ServiceLocator are reinitialized, as a lock held by another thread of
+    the parent at the time of the fork would never be released in the child, and
+    the fork hooks of services are run, so that services holding connections are
+    rebuilt rather than shared with the parent.
+
+    This is called automatically in the child where os.register_at_fork is
+    available. Elsewhere, call it first thing in each worker process, eg from a
+    prefork server's post fork hook.
+    """
+    if not thread:
+        return
+    metrics = _METRICS
+    if metrics is not None:
+        metrics._lock = threading.Lock()
+    profiler = _PROFILER
+    if profiler is not None:
+        profiler._lock = threading.Lock()
+    for locator in list(_LOCATORS):
+        locator._after_fork()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=after_fork)
+
+def checkout(service_key, block=True, timeout=None):
+    """
+    Check out an instance of a pooled service for the duration of a with block.
+    See `ServiceLocator.checkout`.
+    """
+    return SERVICE_LOCATOR.checkout(service_key, block, timeout)
+
+def pool_stats(service_key):
+    """
+    Retrieve the statistics of the pool of a pooled service. See
+    `ServiceLocator.pool_stats`.
+    """
+    return SERVICE_LOCATOR.pool_stats(service_key)
+
+def export_registry():
+    """
+    Describe the configuration and registrations of the ServiceLocator, for
+    `bootstrap` to reproduce in worker processes. See `ServiceLocator.export_registry`.
+    """
+    return SERVICE_LOCATOR.export_registry()
+
+def bootstrap(registry):
+    """
+    Configure the ServiceLocator and register its services as described by
+    `registry`, as returned by `export_registry` in the parent process. This is
+    meant as the initializer of process pool workers, so that the registry is sent
+    once per worker and ServiceProxies sent along with tasks resolve in the
+    worker:
+
+        pool = multiprocessing.Pool(initializer=service_locator.bootstrap,
+                                    initargs=(service_locator.export_registry(),))
+    """
+    SERVICE_LOCATOR.import_registry(registry)
+
+def enable_metrics(sinks=()):
+    """
+    Start collecting metrics, replacing any Metrics previously enabled.
+
+    Parameters
+    ----------
+    sinks : [callable]
+        Callables to pass each event on to, taking the event name, the service key
+        and the value. See `Metrics`.
+
+    Returns
+    -------
+    Metrics
+        The Metrics instance collecting measurements
+    """
+    global _METRICS
+    _METRICS = Metrics(sinks)
+    return _METRICS
+
+def disable_metrics():
+    """
+    Stop collecting metrics
+    """
+    global _METRICS
+    _METRICS = None
+
+def get_metrics():
+    """
+    Retrieve the Metrics instance collecting measurements, or None if metrics are
+    disabled
+    """
+    return _METRICS
+
+def enable_profiling():
+    """
+    Start recording a timeline of service resolution, replacing any Profiler
+    previously enabled.
+
+    Returns
+    -------
+    Profiler
+        The Profiler recording the timeline
+    """
+    global _PROFILER
+    _PROFILER = Profiler()
+    return _PROFILER
+
+def disable_profiling():
+    """
+    Stop recording the timeline of service resolution
+    """
+    global _PROFILER
+    _PROFILER = None
+
+def get_profiler():
+    """
+    Retrieve the Profiler recording the timeline of service resolution, or None if
+    profiling is disabled
+    """
+    return _PROFILER
+
 def configure(**kwargs):
     """
     Configure the ServiceLocator to expect service keys to be superclasses of
@@ -0,0 +1,440 @@
+"""
+analysis.py
+
+Find service keys which are requested but never registered, without importing
+anything. `unbound_services` relies upon importing every consumer module so that
+its module level `get_service_proxy` calls run. Here, the source tree is instead
+parsed with `ast` for service requests - `get_service_proxy`, `get_service`,
+`get_services` and `get_instance` calls, `Inject` class attributes and `inject`
+decorators - and `register` calls, and the keys of the two are compared.
+
+Keys are compared by name. Class keys are qualified with the module they are
+imported from or defined in, so that `BaseLogger` in two modules which import it
+from `example.services` is the same key, `example.services.BaseLogger`. String
+keys are compared as literals. Other keys - computed at runtime, or local to a
+function - are ignored.
+
+Calls are recognized on `service_locator`, on `SERVICE_LOCATOR`, on module level
+names assigned a `ServiceLocator(...)`, and as names imported from service_locator.
+
+Files are parsed in parallel, and the findings for each are cached by path and
+modification time, so that repeated runs only parse files which have changed.
+
+usage:
+    python -m service_locator.analysis [--jobs N] [--cache PATH | --no-cache] PATH...
+
+The exit status is 1 if any requested key is unbound.
+"""
+import argparse
+import ast
+import json
+import multiprocessing
+import os
+import sys
+
+__all__ = ("analyze", "analyze_file", "module_name", "unbound")
+
+# calls which request a service, and which register one
+REQUESTS = ("get_service_proxy", "get_service", "get_services", "get_instance", "Inject")
+INJECT = "inject"
+REGISTER = "register"
+
+# receivers whose methods are the service locator's
+LOCATOR_NAMES = ("service_locator", "SERVICE_LOCATOR")
+
+# bump when the format of analyze_file's findings changes, to invalidate caches
+CACHE_VERSION = 3
+
+DEFAULT_CACHE = ".service_locator_analysis.json"
+
+
+def module_name(path):
+    """
+    Determine the dotted name of the module at `path`, from the packages (directories
+    with an __init__.py) which contain it.
+    """
+    path = os.path.abspath(path)
+    directory, filename = os.path.split(path)
+    name = os.path.splitext(filename)[0]
+    parts = [] if name == "__init__" else [name]
+    while os.path.exists(os.path.join(directory, "__init__.py")):
+        directory, package = os.path.split(directory)
+        parts.append(package)
+    return ".".join(reversed(parts))
+
+
+def _string(node):
+    """
+    The value of `node` if it is a string literal, or else None
+    """
+    if isinstance(node, ast.Str):
+        return node.s
+    return None
+
+
+def _dotted(node):
+    """
+    The dotted name `node` refers to, eg "services.BaseLogger", or None if it is
+    not a name or attribute of one
+    """
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        value = _dotted(node.value)
+        if value is not None:
+            return "{}.{}".format(value, node.attr)
+    return None
+
+
+class _ModuleVisitor(ast.NodeVisitor):
+    """
+    Collects the names a module binds through imports and module level definitions
+    on a first visit, and its service requests and registrations on a second,
+    once `collect` is set. `is_package` tells whether the module is the __init__
+    of the package named `module`.
+    """
+    def __init__(self, module, is_package=False):
+        self.module = module
+        self.is_package = is_package
+        # local name : qualified name
+        self.names = {}
+        # local names of ServiceLocator instances
+        self.locators = set(LOCATOR_NAMES)
+        # [kind, key, line, bindee], kind being "request" or "register"
+        self.findings = []
+        self.collect = False
+        self._depth = 0
+        # the classes and functions being visited, innermost last
+        self._scopes = []
+
+    def _package(self, level):
+        """
+        the package a relative import of `level` is relative to. The name of a
+        package's __init__ is already that of the package
+        """
+        parts = self.module.split(".")
+        if self.is_package:
+            level -= 1
+        return ".".join(parts[:len(parts) - level])
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.asname:
+                self.names[alias.asname] = alias.name
+            else:
+                top = alias.name.split(".")[0]
+                self.names[top] = top
+
+    def visit_ImportFrom(self, node):
+        module = node.module or ""
+        if node.level:
+            package = self._package(node.level)
+            module = ".".join(part for part in (package, module) if part)
+        for alias in node.names:
+            self.names[alias.asname or alias.name] = "{}.{}".format(module, alias.name)
+
+    def visit_ClassDef(self, node):
+        if self._depth == 0:
+            self.names[node.name] = "{}.{}".format(self.module, node.name)
+        self._depth += 1
+        self._scopes.append(node.name)
+        self.generic_visit(node)
+        self._scopes.pop()
+        self._depth -= 1
+
+    def visit_FunctionDef(self, node):
+        self._depth += 1
+        # decorators are visited in the scope of the function, which is their bindee
+        self._scopes.append(node.name)
+        self.generic_visit(node)
+        self._scopes.pop()
+        self._depth -= 1
+
+    def _scope(self):
+        """
+        the innermost class or function being visited, as "module.name", or else
+        the module
+        """
+        if self._scopes:
+            return "{}.{}".format(self.module, self._scopes[-1])
+        return self.module
+
+    def visit_Assign(self, node):
+        if self._depth == 0:
+            func = _dotted(node.value.func) if isinstance(node.value, ast.Call) else None
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.names.setdefault(target.id, "{}.{}".format(self.module, target.id))
+                    if func is not None and func.split(".")[-1] == "ServiceLocator":
+                        self.locators.add(target.id)
+        self.generic_visit(node)
+
+    def _qualify(self, dotted):
+        """
+        qualify the dotted name `dotted` with the module it comes from, or None if
+        the module does not bind it
+        """
+        head, _, tail = dotted.partition(".")
+        qualified = self.names.get(head)
+        if qualified is None:
+            return None
+        return ".".join(part for part in (qualified, tail) if part)
+
+    def _key(self, node):
+        """
+        the name a key is compared by, or None if it is computed at runtime
+        """
+        literal = _string(node)
+        if literal is not None:
+            return repr(literal)
+        dotted = _dotted(node)
+        if dotted is None:
+            return None
+        return self._qualify(dotted)
+
+    def _bindee(self, node):
+        """
+        the value of a bindee expression, where it can be worked out statically
+        """
+        literal = _string(node)
+        if literal is not None:
+            return literal
+        if isinstance(node, ast.Name) and node.id == "__name__":
+            return self.module
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left, right = self._bindee(node.left), self._bindee(node.right)
+            if left is not None and right is not None:
+                return left + right
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+                and node.func.attr == "join" and len(node.args) == 1 \
+                and isinstance(node.args[0], (ast.Tuple, ast.List)):
+            separator = _string(node.func.value)
+            parts = [self._bindee(elt) for elt in node.args[0].elts]
+            if separator is not None and None not in parts:
+                return separator.join(parts)
+        return None
+
+    def _call_name(self, func):
+        """
+        the name of the service locator function called by `func`, or None
+        """
+        if isinstance(func, ast.Attribute):
+            if _dotted(func.value) in self.locators or \
+                    self.names.get(_dotted(func.value) or "", "").split(".")[-1] in LOCATOR_NAMES:
+                return func.attr
+        elif isinstance(func, ast.Name):
+            qualified = self.names.get(func.id, "")
+            if qualified.split(".")[0] == "service_locator":
+                return qualified.split(".")[-1]
+        return None
+
+    @staticmethod
+    def _argument(node, position, keywords):
+        """
+        the argument of call `node` at `position`, or passed as one of `keywords`
+        """
+        if len(node.args) > position:
+            return node.args[position]
+        for keyword in node.keywords:
+            if keyword.arg in keywords:
+                return keyword.value
+        return None
+
+    def visit_Call(self, node):
+        name = self._call_name(node.func) if self.collect else None
+        if name in REQUESTS or name == REGISTER:
+            key_node = self._argument(node, 0, ("service_key", "key"))
+            key = self._key(key_node) if key_node is not None else None
+            if key is not None:
+                if name == REGISTER:
+                    self.findings.append(["register", key, node.lineno, self.module])
+                else:
+                    bindee = None
+                    if name == "get_service_proxy":
+                        bindee_node = self._argument(node, 1, ("bindee",))
+                        if bindee_node is not None:
+                            bindee = self._bindee(bindee_node)
+                    elif name == "Inject":
+                        bindee = self._scope()
+                    self.findings.append(["request", key, node.lineno, bindee or self.module])
+        elif name == INJECT:
+            for keyword in node.keywords:
+                key = self._key(keyword.value)
+                if key is not None:
+                    self.findings.append(["request", key, node.lineno, self._scope()])
+        self.generic_visit(node)
+
+
+def analyze_file(path):
+    """
+    Parse the python source at `path` for service requests and registrations.
+
+    Returns
+    -------
+    [[kind, key, line, bindee],...]
+        kind is "request" or "register", key the name the service key is compared
+        by, and bindee that of the requester, or the module for a registration.
+
+    Raises
+    ------
+    SyntaxError
+        If the file cannot be parsed.
+    """
+    with open(path) as fh:
+        source = fh.read()
+    tree = ast.parse(source, path)
+    is_package = os.path.splitext(os.path.basename(path))[0] == "__init__"
+    visitor = _ModuleVisitor(module_name(path), is_package)
+    visitor.visit(tree)
+    visitor.collect = True
+    visitor.visit(tree)
+    return visitor.findings
+
+
+def _analyze_entry(path):
+    """
+    analyze_file for a worker process, reporting errors rather than raising them
+    """
+    try:
+        return path, analyze_file(path), None
+    except (SyntaxError, IOError) as e:
+        return path, [], str(e)
+
+
+def _source_files(paths):
+    """
+    the python source files at, or beneath, `paths`
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+                for filename in sorted(filenames):
+                    if filename.endswith(".py"):
+                        yield os.path.abspath(os.path.join(directory, filename))
+        else:
+            yield os.path.abspath(path)
+
+
+def _load_cache(cache_path):
+    """
+    the cached findings at `cache_path` as { path : [mtime, findings] }
+    """
+    try:
+        with open(cache_path) as fh:
+            cache = json.load(fh)
+    except (IOError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+
+def _save_cache(cache_path, files):
+    with open(cache_path, "w") as fh:
+        json.dump({"version": CACHE_VERSION, "files": files}, fh, sort_keys=True)
+
+
+def analyze(paths, jobs=None, cache_path=None):
+    """
+    Analyze the python source files at, or beneath, `paths`. Files whose findings
+    are cached at `cache_path` under their current modification time are not parsed
+    again. The rest are parsed by `jobs` processes.
+
+    Parameters
+    ----------
+    paths : [str]
+        Files and directories to analyze.
+    jobs : int | None
+        Number of processes to parse with. Defaults to the number of CPUs.
+    cache_path : str | None
+        Where to cache findings between runs. If None, nothing is cached.
+
+    Returns
+    -------
+    ({ path : [[kind, key, line, bindee],...] }, { path : error })
+        The findings of each file, and the files which could not be parsed.
+    """
+    cached = _load_cache(cache_path) if cache_path else {}
+    files = {}
+    findings = {}
+    stale = []
+    for path in _source_files(paths):
+        mtime = os.path.getmtime(path)
+        entry = cached.get(path)
+        if entry is not None and entry[0] == mtime:
+            files[path] = entry
+            findings[path] = entry[1]
+        else:
+            stale.append((path, mtime))
+    jobs = jobs or multiprocessing.cpu_count()
+    if jobs > 1 and len(stale) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(stale)))
+        try:
+            results = pool.map(_analyze_entry, [path for path, _ in stale])
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_analyze_entry(path) for path, _ in stale]
+    errors = {}
+    mtimes = dict(stale)
+    for path, file_findings, error in results:
+        findings[path] = file_findings
+        if error is None:
+            files[path] = [mtimes[path], file_findings]
+        else:
+            errors[path] = error
+    if cache_path:
+        _save_cache(cache_path, files)
+    return findings, errors
+
+
+def unbound(findings):
+    """
+    Determine the keys which are requested but never registered.
+
+    Returns
+    -------
+    { key : [(path, line, bindee),...] }
+        The requests of each unbound key.
+    """
+    registered = set(key for file_findings in findings.itervalues()
+                     for kind, key, _, _ in file_findings if kind == "register")
+    missing = {}
+    for path, file_findings in sorted(findings.iteritems()):
+        for kind, key, line, bindee in file_findings:
+            if kind == "request" and key not in registered:
+                missing.setdefault(key, []).append((path, line, bindee))
+    return missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="report service keys which are requested but never registered")
+    parser.add_argument("paths", nargs="+", help="python files and directories to analyze")
+    parser.add_argument("--jobs", type=int, help="number of processes (default: number of CPUs)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE,
+                        help="file to cache findings in (default {})".format(DEFAULT_CACHE))
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the cache")
+    args = parser.parse_args(argv)
+
+    findings, errors = analyze(args.paths, args.jobs, None if args.no_cache else args.cache)
+    for path, error in sorted(errors.iteritems()):
+        print >> sys.stderr, "WARNING: could not parse {}: {}".format(path, error)
+    missing = unbound(findings)
+    if not missing:
+        print "All {} requested service keys are registered".format(
+            len(set(key for file_findings in findings.itervalues()
+                    for kind, key, _, _ in file_findings if kind == "request")))
+        return 0
+    print "ERROR: {} service key(s) requested but never registered:".format(len(missing))
+    for key in sorted(missing):
+        print key
+        for path, line, bindee in missing[key]:
+            print "\t{}:{} ({})".format(os.path.relpath(path), line, bindee)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""
+service registered by import path in the tests. It must not be imported elsewhere.
+"""
+
+
+class LazyService(object):
+    """service whose module is imported on first lookup"""
+    def test(self):
+        return "success"
+
+
+# names bound in compound statements and by tuple assignment, for validation
+try:
+    from collections import OrderedDict as ConditionalService
+except ImportError:
+    ConditionalService = dict
+
+if LazyService:
+    FirstService, SecondService = LazyService, LazyService
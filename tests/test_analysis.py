@@ -0,0 +1,126 @@
+import unittest
+import os
+import shutil
+import tempfile
+import textwrap
+from .context import service_locator
+from service_locator import analysis
+
+
+class TestAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write("app/__init__.py", "")
+        self.write("app/services.py", """
+            class BaseLogger(object):
+                pass
+
+            class BaseCache(object):
+                pass
+            """)
+        self.write("app/consumer.py", """
+            from service_locator import get_service
+            from app.context import service_locator
+            from .services import BaseLogger, BaseCache
+
+            LOGGER = service_locator.get_service_proxy(BaseLogger, __name__)(__name__)
+
+            class Consumer(object):
+                cache = service_locator.get_service_proxy(
+                    service_key=BaseCache, bindee=".".join((__name__, "Consumer")))
+
+                def run(self, key):
+                    get_service("settings")
+                    # local keys are ignored
+                    service_locator.get_service(key)
+
+            class Injected(object):
+                store = service_locator.Inject("store")
+
+            @service_locator.inject(logger=BaseLogger, clock="clock")
+            def report(logger, clock):
+                pass
+            """)
+        self.write("app/main.py", """
+            from app.context import service_locator
+            from app import services
+
+            service_locator.register(services.BaseLogger, "app.logger:Logger")
+            """)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, source):
+        path = os.path.join(self.root, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as fh:
+            fh.write(textwrap.dedent(source))
+        return path
+
+    def test_reports_unbound_keys_and_requesters(self):
+        findings, errors = analysis.analyze([self.root], jobs=1)
+        self.assertEquals({}, errors)
+        missing = analysis.unbound(findings)
+        self.assertEquals(set(["app.services.BaseCache", "'settings'", "'store'", "'clock'"]),
+                          set(missing))
+        self.assertEquals("app.consumer.Injected", missing["'store'"][0][2])
+        self.assertEquals("app.consumer.report", missing["'clock'"][0][2])
+        path, line, bindee = missing["app.services.BaseCache"][0]
+        self.assertEquals("app.consumer.Consumer", bindee)
+        self.assertEquals(9, line)
+        self.assertTrue(path.endswith("consumer.py"))
+        self.assertEquals("app.consumer", missing["'settings'"][0][2])
+
+    def test_resolves_relative_imports_in_package_init(self):
+        self.write("app/__init__.py", """
+            from app.context import service_locator
+            from .services import BaseCache
+
+            service_locator.register(BaseCache, "app.cache:Cache")
+            """)
+        findings, errors = analysis.analyze([self.root], jobs=1)
+        self.assertEquals({}, errors)
+        self.assertFalse("app.services.BaseCache" in analysis.unbound(findings))
+
+    def test_parses_in_parallel(self):
+        findings, _ = analysis.analyze([self.root], jobs=2)
+        self.assertEquals(findings, analysis.analyze([self.root], jobs=1)[0])
+
+    def test_caches_by_modification_time(self):
+        cache = os.path.join(self.root, "cache.json")
+        analysis.analyze([self.root], jobs=1, cache_path=cache)
+        original = analysis.analyze_file
+        parsed = []
+
+        def analyze_file(path):
+            parsed.append(os.path.basename(path))
+            return original(path)
+
+        analysis.analyze_file = analyze_file
+        try:
+            path = self.write("app/main.py", """
+                from app.context import service_locator
+                from app.services import BaseCache
+
+                service_locator.register(BaseCache, "app.cache:Cache")
+                """)
+            mtime = os.path.getmtime(path) + 10
+            os.utime(path, (mtime, mtime))
+            findings, _ = analysis.analyze([self.root], jobs=1, cache_path=cache)
+        finally:
+            analysis.analyze_file = original
+        self.assertEquals(["main.py"], parsed)
+        self.assertEquals(set(["app.services.BaseLogger", "'settings'", "'store'", "'clock'"]),
+                          set(analysis.unbound(findings)))
+
+    def test_reports_unparsable_files(self):
+        path = self.write("app/broken.py", "def broken(:\n")
+        _, errors = analysis.analyze([self.root], jobs=1)
+        self.assertEquals([path], errors.keys())
+
+    def test_module_name(self):
+        self.assertEquals("app.consumer", analysis.module_name(os.path.join(self.root, "app/consumer.py")))
+        self.assertEquals("app", analysis.module_name(os.path.join(self.root, "app/__init__.py")))
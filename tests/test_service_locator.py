@@ -1,4 +1,12 @@
 import unittest
+import collections
+import multiprocessing
+import os
+import pickle
+import signal
+import sys
+import threading
+import time
 from .context import service_locator
 
 class UseSuperclassCM(object):
@@ -97,3 +105,1297 @@ class TestServiceLocator(unittest.TestCase):
             with self.assertRaises(Exception) as context:
                 service_locator.register("BaseFoo", Foo)
             self.assertTrue( context.exception is not None)
+
+
+class TestLockFreeReads(unittest.TestCase):
+
+    def test_register_replaces_snapshot(self):
+        class Foo(object):
+            pass
+
+        before = service_locator.SERVICE_LOCATOR._services
+        service_locator.register(Foo, Foo)
+        self.assertFalse(Foo in before)
+        self.assertTrue(service_locator.SERVICE_LOCATOR._services is not before)
+
+    def test_reads_do_not_wait_on_lock(self):
+        class Foo(object):
+            pass
+
+        service_locator.register(Foo, Foo)
+        found = []
+
+        def reader():
+            found.append(service_locator.get_service(Foo))
+            found.append(service_locator.SERVICE_LOCATOR.has_service(Foo))
+
+        with service_locator.LockCM(service_locator.SERVICE_LOCATOR._lock):
+            thread = threading.Thread(target=reader)
+            thread.daemon = True
+            thread.start()
+            thread.join(5)
+        self.assertEquals([Foo, True], found)
+
+
+class TestServiceProxy(unittest.TestCase):
+
+    def test_caches_bound_methods_when_asked(self):
+        class Foo(object):
+            def __init__(self, name):
+                self.name = name
+
+            def test(self):
+                return self.name
+
+        service_locator.register(Foo, Foo)
+        proxy = service_locator.ServiceProxy(Foo, cache_methods=True)("foo")
+        self.assertEquals("foo", proxy.test())
+        self.assertTrue("test" in proxy.__dict__)
+        self.assertEquals("foo", proxy.name)
+        self.assertFalse("name" in proxy.__dict__)
+
+    def test_forwards_without_caching_by_default(self):
+        class Foo(object):
+            def test(self):
+                return "success"
+
+        service_locator.register(Foo, Foo)
+        proxy = service_locator.ServiceProxy(Foo)
+        self.assertEquals("success", proxy.test())
+        self.assertFalse("test" in proxy.__dict__)
+
+    def test_stores_no_args_when_called_without(self):
+        class Foo(object):
+            pass
+
+        proxy = service_locator.ServiceProxy(Foo)()
+        self.assertTrue(proxy._call is service_locator._NO_CALL)
+        self.assertFalse(hasattr(proxy, "_args"))
+
+    def test_keeps_args_once_resolved(self):
+        class Foo(object):
+            def __init__(self, name):
+                self.name = name
+
+        service_locator.register(Foo, Foo)
+        proxy = service_locator.ServiceProxy(Foo)("foo")
+        self.assertEquals("foo", proxy.name)
+        # kept for pickling
+        self.assertEquals((("foo",), {}), proxy._call)
+
+    def test_resolves_exactly_once_across_threads(self):
+        built = []
+
+        class Foo(object):
+            def __init__(self, name):
+                time.sleep(0.01)
+                built.append(name)
+                self.name = name
+
+        service_locator.register(Foo, Foo)
+        proxy = service_locator.ServiceProxy(Foo)("foo")
+        gate = threading.Event()
+        names = []
+        errors = []
+
+        def worker():
+            gate.wait()
+            try:
+                names.append(proxy.name)
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        gate.set()
+        for thread in threads:
+            thread.join()
+        self.assertEquals([], errors)
+        self.assertEquals(["foo"], built)
+        self.assertEquals(["foo"] * 8, names)
+
+
+class TestLifetimes(unittest.TestCase):
+
+    def make_service(self):
+        class Foo(object):
+            built = []
+
+            def __init__(self, name=None):
+                self.name = name
+                Foo.built.append(self)
+
+            def me(self):
+                return self
+        return Foo
+
+    def test_singleton_shared_between_proxies(self):
+        Foo = self.make_service()
+        service_locator.register(Foo, Foo, service_locator.SINGLETON)
+        first = service_locator.ServiceProxy(Foo)("first")
+        second = service_locator.ServiceProxy(Foo)("second")
+        self.assertTrue(first.me() is second.me())
+        self.assertEquals("first", second.name)
+        self.assertTrue(first.me() is service_locator.get_instance(Foo))
+
+    def test_transient_builds_every_time(self):
+        Foo = self.make_service()
+        service_locator.register(Foo, Foo, service_locator.TRANSIENT)
+        proxy = service_locator.ServiceProxy(Foo, cache_methods=True)
+        self.assertTrue(proxy.me() is not proxy.me())
+        self.assertEquals(2, len(Foo.built))
+
+    def test_thread_local_one_per_thread(self):
+        Foo = self.make_service()
+        service_locator.register(Foo, Foo, service_locator.THREAD_LOCAL)
+        proxy = service_locator.ServiceProxy(Foo)
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(proxy.me()))
+        thread.start()
+        thread.join()
+        self.assertTrue(proxy.me() is proxy.me())
+        self.assertTrue(proxy.me() is not seen[0])
+        self.assertEquals(2, len(Foo.built))
+
+    def test_context_local_reused_in_context(self):
+        Foo = self.make_service()
+        service_locator.register(Foo, Foo, service_locator.CONTEXT_LOCAL)
+        self.assertTrue(service_locator.get_instance(Foo) is service_locator.get_instance(Foo))
+
+    def test_rejects_lifetime_for_instance(self):
+        Foo = self.make_service()
+        with self.assertRaises(ValueError):
+            service_locator.register(Foo, Foo(), service_locator.SINGLETON)
+
+    def test_rejects_unknown_lifetime(self):
+        Foo = self.make_service()
+        with self.assertRaises(ValueError):
+            service_locator.register(Foo, Foo, "forever")
+
+
+class TestWarmUp(unittest.TestCase):
+
+    def test_builds_dependencies_first(self):
+        built = []
+
+        class BaseDep(object):
+            pass
+
+        class BaseUser(object):
+            pass
+
+        class Dep(BaseDep):
+            def __init__(self, name):
+                time.sleep(0.01)
+                built.append(name)
+
+        class User(BaseUser):
+            dep = service_locator.get_service_proxy(BaseDep, __name__ + ".User")("dep")
+
+            def __init__(self, name):
+                built.append(name)
+
+        user = service_locator.get_service_proxy(BaseUser, "consumer")("user")
+        service_locator.register(BaseDep, Dep)
+        service_locator.register(BaseUser, User)
+        self.assertEquals(set([BaseDep]), service_locator.dependency_graph()[BaseUser])
+        service_locator.warm_up()
+        self.assertEquals(["dep", "user"], built)
+        self.assertTrue(user._service is not None)
+
+    def test_skips_proxies_awaiting_arguments(self):
+        class Foo(object):
+            pass
+
+        proxy = service_locator.get_service_proxy(Foo, "consumer")
+        service_locator.register(Foo, Foo)
+        service_locator.warm_up()
+        self.assertTrue(proxy._service is None)
+
+    def test_detects_cycles(self):
+        with self.assertRaises(ValueError):
+            service_locator._toposort({"a": set(["b"]), "b": set(["a"])})
+
+
+class TestBindings(unittest.TestCase):
+
+    def test_deduplicates_bindings(self):
+        class Foo(object):
+            pass
+
+        for _ in range(10):
+            service_locator.get_service_proxy(Foo, "consumer")
+        unbound = [x for x in service_locator.unbound_services() if x.bind_key is Foo]
+        self.assertEquals(1, len(unbound))
+
+    def test_tracks_unbound_count(self):
+        class Foo(object):
+            pass
+
+        count = service_locator.SERVICE_LOCATOR.unbound_count()
+        service_locator.get_service_proxy(Foo, "consumer")
+        service_locator.get_service_proxy(Foo, "other consumer")
+        self.assertEquals(count + 2, service_locator.SERVICE_LOCATOR.unbound_count())
+        service_locator.register(Foo, Foo)
+        self.assertEquals(count, service_locator.SERVICE_LOCATOR.unbound_count())
+
+    def test_purges_collected_bindees(self):
+        class Foo(object):
+            pass
+
+        class Consumer(object):
+            pass
+
+        count = service_locator.SERVICE_LOCATOR.unbound_count()
+        consumer = Consumer()
+        service_locator.get_service_proxy(Foo, consumer)
+        self.assertEquals(count + 1, service_locator.SERVICE_LOCATOR.unbound_count())
+        del consumer
+        self.assertEquals(count, service_locator.SERVICE_LOCATOR.unbound_count())
+
+    def test_binding_is_compact(self):
+        class Foo(object):
+            pass
+
+        binding = service_locator.ServiceBinding(Foo, "consumer")
+        self.assertFalse(hasattr(binding, "__dict__"))
+        self.assertEquals(Foo, binding.bind_key)
+        self.assertEquals("consumer", binding.bindee)
+        self.assertEquals("ServiceBinding(bind_key={}, bindee=consumer)".format(Foo), repr(binding))
+
+    def test_binds_string_keys(self):
+        service_locator.get_service_proxy("string key", "consumer")
+        unbound = [x.bind_key for x in service_locator.unbound_services()]
+        self.assertTrue("string key" in unbound)
+
+
+class TestLocatorInstances(unittest.TestCase):
+
+    def test_works_without_threading(self):
+        class Foo(object):
+            def test(self):
+                return "success"
+
+        self.addCleanup(setattr, service_locator, "thread", service_locator.thread)
+        service_locator.thread = None
+        locator = service_locator.ServiceLocator()
+        locator.register(Foo, Foo)
+        locator.get_service_proxy("missing", "consumer")
+        self.assertEquals(["missing"], [binding.bind_key for binding in locator.unbound_services()])
+        self.assertEquals("success", locator.get_service_proxy(Foo, "consumer")().test())
+
+    def test_instances_do_not_share_services(self):
+        class Foo(object):
+            pass
+
+        first = service_locator.ServiceLocator()
+        second = service_locator.ServiceLocator()
+        first.register(Foo, Foo)
+        self.assertTrue(first.has_service(Foo))
+        self.assertFalse(second.has_service(Foo))
+        self.assertFalse(service_locator.SERVICE_LOCATOR.has_service(Foo))
+
+    def test_instances_do_not_share_bindings(self):
+        class Foo(object):
+            pass
+
+        locator = service_locator.ServiceLocator()
+        count = service_locator.SERVICE_LOCATOR.unbound_count()
+        proxy = locator.get_service_proxy(Foo, "consumer")
+        self.assertEquals(1, locator.unbound_count())
+        self.assertEquals(count, service_locator.SERVICE_LOCATOR.unbound_count())
+        locator.register(Foo, Foo)
+        self.assertTrue(isinstance(proxy._resolve(), Foo))
+
+    def test_instances_do_not_share_locks(self):
+        class Foo(object):
+            pass
+
+        locator = service_locator.ServiceLocator()
+        registered = []
+        with service_locator.LockCM(service_locator.SERVICE_LOCATOR._lock):
+            thread = threading.Thread(target=lambda: registered.append(locator.register(Foo, Foo)))
+            thread.daemon = True
+            thread.start()
+            thread.join(5)
+        self.assertEquals([None], registered)
+
+
+class TestMultipleServices(unittest.TestCase):
+
+    def test_collects_services_in_order(self):
+        class BaseSink(object):
+            pass
+
+        class FirstSink(BaseSink):
+            pass
+
+        class SecondSink(BaseSink):
+            pass
+
+        locator = service_locator.ServiceLocator(key_is_superclass=True)
+        locator.register(BaseSink, FirstSink, multiple=True)
+        locator.register(BaseSink, SecondSink, multiple=True)
+        self.assertEquals((FirstSink, SecondSink), locator.collection(BaseSink))
+        self.assertTrue(locator.service(BaseSink) is SecondSink)
+
+    def test_reuses_collection_until_registration(self):
+        locator = service_locator.ServiceLocator()
+        locator.register("sinks", "first", multiple=True)
+        collection = locator.collection("sinks")
+        self.assertTrue(collection is locator.collection("sinks"))
+        locator.register("sinks", "second", multiple=True)
+        self.assertEquals(("first", "second"), locator.collection("sinks"))
+
+    def test_single_registration_replaces_collection(self):
+        locator = service_locator.ServiceLocator()
+        locator.register("sinks", "first", multiple=True)
+        locator.register("sinks", "second")
+        self.assertEquals(("second",), locator.collection("sinks"))
+
+    def test_imports_paths_in_collection(self):
+        locator = service_locator.ServiceLocator()
+        locator.register("sinks", "collections:OrderedDict", multiple=True)
+        self.assertEquals((collections.OrderedDict,), locator.collection("sinks"))
+
+    def test_empty_collection_for_unknown_key(self):
+        self.assertEquals((), service_locator.get_services("no such key"))
+
+    def test_concurrent_registrations_agree(self):
+        locator = service_locator.ServiceLocator()
+        start = threading.Event()
+
+        def register(service):
+            start.wait()
+            for _ in xrange(200):
+                locator.register("sink", service)
+
+        threads = [threading.Thread(target=register, args=(object(),)) for _ in xrange(4)]
+        for registering in threads:
+            registering.start()
+        start.set()
+        for registering in threads:
+            registering.join()
+        self.assertTrue(locator.service("sink") is locator.collection("sink")[-1])
+
+
+class TestHierarchicalLookup(unittest.TestCase):
+
+    def setUp(self):
+        class BaseFoo(object):
+            pass
+
+        class SpecificFoo(BaseFoo):
+            pass
+
+        class Foo(SpecificFoo):
+            pass
+
+        self.BaseFoo, self.SpecificFoo, self.Foo = BaseFoo, SpecificFoo, Foo
+        self.locator = service_locator.ServiceLocator(key_is_superclass=True,
+                                                      hierarchical_lookup=True)
+
+    def test_resolves_more_general_key(self):
+        self.locator.register(self.SpecificFoo, self.Foo)
+        self.assertTrue(self.locator.service(self.BaseFoo) is self.Foo)
+        self.assertTrue(self.locator.has_service(self.BaseFoo))
+
+    def test_resolves_more_specific_key(self):
+        self.locator.register(self.BaseFoo, self.Foo)
+        self.assertTrue(self.locator.service(self.SpecificFoo) is self.Foo)
+
+    def test_rejects_unsatisfying_service(self):
+        self.locator.register(self.BaseFoo, self.SpecificFoo)
+        with self.assertRaises(KeyError):
+            self.locator.service(self.Foo)
+
+    def test_remembers_until_registration(self):
+        self.locator.register(self.SpecificFoo, self.Foo)
+        self.locator.service(self.BaseFoo)
+        self.assertTrue(self.BaseFoo in self.locator._lookup)
+        self.locator.register(self.BaseFoo, self.SpecificFoo)
+        self.assertFalse(self.BaseFoo in self.locator._aliases)
+        self.assertTrue(self.locator.service(self.BaseFoo) is self.SpecificFoo)
+
+    def test_forgets_on_registration_by_import_path(self):
+        class Mid(dict):
+            pass
+
+        class Impl(Mid):
+            pass
+
+        locator = service_locator.ServiceLocator(hierarchical_lookup=True)
+        locator.register(Mid, Impl)
+        self.assertTrue(locator.service(dict) is Impl)
+        locator.register(dict, "collections:OrderedDict")
+        self.assertTrue(locator.service(dict) is collections.OrderedDict)
+
+    def test_exact_lookup_by_default(self):
+        locator = service_locator.ServiceLocator()
+        locator.register(self.SpecificFoo, self.Foo)
+        with self.assertRaises(KeyError):
+            locator.service(self.BaseFoo)
+
+    def test_counts_resolvable_bindings_as_bound(self):
+        self.locator.get_service_proxy(self.BaseFoo, "consumer")
+        self.assertEquals(1, len(self.locator.unbound_services()))
+        self.locator.register(self.SpecificFoo, self.Foo)
+        self.assertEquals([], self.locator.unbound_services())
+        self.assertEquals(0, self.locator.unbound_count())
+
+
+class TestMetrics(unittest.TestCase):
+
+    def tearDown(self):
+        service_locator.disable_metrics()
+
+    def test_disabled_by_default(self):
+        self.assertTrue(service_locator.get_metrics() is None)
+
+    def test_records_lookups_resolutions_and_instantiations(self):
+        class Foo(object):
+            def test(self):
+                return "success"
+
+        events = []
+        metrics = service_locator.enable_metrics([lambda *event: events.append(event)])
+        service_locator.register(Foo, Foo)
+        proxy = service_locator.ServiceProxy(Foo)
+        proxy.test()
+        proxy.test()
+        snapshot = metrics.snapshot()
+        Metrics = service_locator.Metrics
+        self.assertEquals(1, snapshot[Metrics.LOOKUP][Foo]["count"])
+        self.assertEquals(1, snapshot[Metrics.RESOLVE_MISS][Foo]["count"])
+        self.assertEquals(1, snapshot[Metrics.RESOLVE_HIT][Foo]["count"])
+        self.assertEquals(1, snapshot[Metrics.INSTANTIATE][Foo]["count"])
+        self.assertTrue(snapshot[Metrics.LOCK_WAIT][None]["count"] >= 1)
+        self.assertTrue((Metrics.LOOKUP, Foo, 1) in events)
+
+    def test_reset_discards_measurements(self):
+        class Foo(object):
+            pass
+
+        metrics = service_locator.enable_metrics()
+        service_locator.register(Foo, Foo)
+        service_locator.get_service(Foo)
+        metrics.reset()
+        self.assertEquals({}, metrics.snapshot())
+
+
+class TestImportPaths(unittest.TestCase):
+
+    def test_defers_import_until_lookup(self):
+        class BaseLazy(object):
+            pass
+
+        service_locator.register(BaseLazy, "tests.lazy_service:LazyService")
+        self.assertTrue(service_locator.SERVICE_LOCATOR.has_service(BaseLazy))
+        proxy = service_locator.ServiceProxy(BaseLazy)
+        self.assertEquals("success", proxy.test())
+        self.assertTrue("tests.lazy_service" in sys.modules)
+        self.assertEquals("LazyService", service_locator.get_service(BaseLazy).__name__)
+
+    def test_checks_superclass_on_import(self):
+        class BaseFoo(object):
+            pass
+
+        locator = service_locator.ServiceLocator(key_is_superclass=True)
+        locator.register(BaseFoo, "collections:OrderedDict")
+        with self.assertRaises(AssertionError):
+            locator.service(BaseFoo)
+
+    def test_applies_lifetime_on_import(self):
+        class BaseFoo(object):
+            pass
+
+        service_locator.register(BaseFoo, "collections:OrderedDict", service_locator.SINGLETON)
+        self.assertTrue(service_locator.get_instance(BaseFoo) is service_locator.get_instance(BaseFoo))
+
+    def slow_import(self, started, proceed):
+        """
+        replace the import of services by import path with one which waits for
+        `proceed`, having set `started`, until the end of the test
+        """
+        import_path = service_locator._import_path
+
+        def slow(path):
+            started.set()
+            proceed.wait()
+            return import_path(path)
+        service_locator._import_path = slow
+        self.addCleanup(setattr, service_locator, "_import_path", import_path)
+
+    def test_imports_once_under_concurrent_lookups(self):
+        started, proceed = threading.Event(), threading.Event()
+        self.slow_import(started, proceed)
+        locator = service_locator.ServiceLocator()
+        locator.register("svc", "collections:OrderedDict", service_locator.SINGLETON)
+        instances = []
+        threads = [threading.Thread(target=lambda: instances.append(locator.instance("svc")))
+                   for _ in xrange(4)]
+        for looking_up in threads:
+            looking_up.start()
+        started.wait()
+        time.sleep(0.05)
+        proceed.set()
+        for looking_up in threads:
+            looking_up.join()
+        self.assertEquals(4, len(instances))
+        self.assertEquals(1, len(set(id(instance) for instance in instances)))
+
+    def test_registration_during_import_wins(self):
+        class New(object):
+            pass
+
+        started, proceed = threading.Event(), threading.Event()
+        self.slow_import(started, proceed)
+        locator = service_locator.ServiceLocator()
+        locator.register("svc", "collections:OrderedDict")
+        found = []
+        looking_up = threading.Thread(target=lambda: found.append(locator.service("svc")))
+        looking_up.start()
+        started.wait()
+        locator.register("svc", New)
+        proceed.set()
+        looking_up.join()
+        self.assertEquals([New], found)
+        self.assertTrue(locator.service("svc") is New)
+
+    def test_validates_paths_without_importing(self):
+        locator = service_locator.ServiceLocator(validate_import_paths=True)
+        locator.register("validated", "tests.lazy_service:LazyService")
+        with self.assertRaises(ImportError):
+            locator.register("missing module", "tests.no_such_module:LazyService")
+        with self.assertRaises(ImportError):
+            locator.register("missing attribute", "tests.lazy_service:NoSuchService")
+        # parse the module, even if other tests have imported it
+        imported = sys.modules.pop("tests.lazy_service", None)
+        try:
+            locator.register("conditional", "tests.lazy_service:ConditionalService")
+            locator.register("unpacked", "tests.lazy_service:SecondService")
+        finally:
+            if imported is not None:
+                sys.modules["tests.lazy_service"] = imported
+
+
+class TestFork(unittest.TestCase):
+
+    def test_prefork_builds_selected_services(self):
+        class Expensive(object):
+            pass
+
+        class Other(object):
+            pass
+
+        locator = service_locator.ServiceLocator()
+        locator.register(Expensive, Expensive, service_locator.SINGLETON)
+        locator.register(Other, Other, service_locator.SINGLETON)
+        locator.prefork([Expensive])
+        self.assertTrue(locator.lifetime(Expensive)._instance is not None)
+        self.assertTrue(locator.lifetime(Other)._instance is None)
+
+    def test_after_fork_runs_hooks(self):
+        class Connection(object):
+            def __init__(self, generation=0):
+                self.generation = generation
+
+        def reconnect(connection):
+            return Connection(connection.generation + 1)
+
+        locator = service_locator.ServiceLocator()
+        locator.register("pooled", Connection, service_locator.SINGLETON, fork_hook=reconnect)
+        locator.register("shared", Connection(), fork_hook=reconnect)
+        pooled = locator.get_service_proxy("pooled", "consumer")()
+        shared = locator.get_service_proxy("shared", "consumer")
+        self.assertEquals(0, pooled.generation)
+        self.assertEquals(0, shared.generation)
+        lock = locator._lock
+        locator._after_fork()
+        self.assertTrue(locator._lock is not lock)
+        self.assertEquals(1, pooled.generation)
+        self.assertEquals(1, shared.generation)
+        self.assertTrue(shared._service is locator.service("shared"))
+        self.assertTrue(pooled._service is locator.instance("pooled"))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_child_registers_while_parent_holds_lock(self):
+        locator = service_locator.ServiceLocator()
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with service_locator.LockCM(locator._lock):
+                held.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        held.wait()
+        try:
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    service_locator.after_fork()
+                    locator.register("child", object())
+                    status = 0
+                finally:
+                    os._exit(status)
+            _, status = os.waitpid(pid, 0)
+        finally:
+            release.set()
+            holder.join()
+        self.assertEquals(0, status)
+
+
+class PickledBase(object):
+    """key of the services pickled by TestPickling"""
+    pass
+
+
+class PickledService(PickledBase):
+    """service pickled by TestPickling"""
+    def __init__(self, name="default"):
+        self.name = name
+
+
+def proxy_name(proxy):
+    """task run in pool workers by TestPickling"""
+    return proxy.name
+
+
+class TestPickling(unittest.TestCase):
+
+    def test_pickles_key_and_arguments(self):
+        service_locator.register(PickledBase, PickledService)
+        proxy = service_locator.get_service_proxy(PickledBase, "consumer")("pickled")
+        self.assertEquals("pickled", proxy.name)
+        copy = pickle.loads(pickle.dumps(proxy, pickle.HIGHEST_PROTOCOL))
+        self.assertTrue(copy._service is None)
+        self.assertEquals("pickled", copy.name)
+        self.assertTrue(copy._service is not proxy._service)
+
+    def test_exports_registry(self):
+        locator = service_locator.ServiceLocator(cache_proxy_methods=True)
+        locator.register(PickledBase, PickledService, service_locator.SINGLETON)
+        locator.register("plugins", "tests.lazy_service:LazyService")
+        locator.register("plugins", PickledService("instance"), multiple=True)
+        registry = pickle.loads(pickle.dumps(locator.export_registry()))
+        copy = service_locator.ServiceLocator()
+        copy.import_registry(registry)
+        self.assertTrue(copy.cache_proxy_methods)
+        self.assertTrue(copy.service(PickledBase) is PickledService)
+        self.assertTrue(copy.instance(PickledBase) is copy.instance(PickledBase))
+        plugins = copy.collection("plugins")
+        self.assertEquals("LazyService", plugins[0].__name__)
+        self.assertEquals("instance", plugins[1].name)
+
+    def test_rejects_classes_without_import_path(self):
+        class Local(object):
+            pass
+
+        locator = service_locator.ServiceLocator()
+        locator.register(Local, Local)
+        with self.assertRaises(ValueError):
+            locator.export_registry()
+
+    def test_resolves_in_pool_workers(self):
+        locator = service_locator.ServiceLocator()
+        locator.register(PickledBase, PickledService)
+        pool = multiprocessing.Pool(1, service_locator.bootstrap, (locator.export_registry(),))
+        try:
+            proxies = [service_locator.ServiceProxy(PickledBase)(name) for name in ("a", "b")]
+            self.assertEquals(["a", "b"], pool.map(proxy_name, proxies))
+        finally:
+            pool.close()
+            pool.join()
+
+
+class TestPooled(unittest.TestCase):
+
+    def setUp(self):
+        class Connection(object):
+            def __init__(self, dsn="default"):
+                self.dsn = dsn
+                self.healthy = True
+
+        self.Connection = Connection
+        self.locator = service_locator.ServiceLocator()
+
+    def test_checks_out_and_returns(self):
+        self.locator.register("db", self.Connection, service_locator.Pooled(min_size=2, max_size=2))
+        with self.locator.checkout("db") as first:
+            with self.locator.checkout("db") as second:
+                self.assertTrue(first is not second)
+                stats = self.locator.pool_stats("db")
+                self.assertEquals(2, stats["in_use"])
+                self.assertEquals(0, stats["idle"])
+        with self.locator.checkout("db") as third:
+            self.assertTrue(third is first or third is second)
+        stats = self.locator.pool_stats("db")
+        self.assertEquals(2, stats["created"])
+        self.assertEquals(3, stats["checkouts"])
+        self.assertEquals(2, stats["idle"])
+
+    def test_builds_with_configured_arguments(self):
+        self.locator.register("db", self.Connection, service_locator.Pooled(kwargs={"dsn": "pg://"}))
+        with self.locator.checkout("db") as connection:
+            self.assertEquals("pg://", connection.dsn)
+
+    def test_non_blocking_checkout_of_exhausted_pool(self):
+        self.locator.register("db", self.Connection, service_locator.Pooled(max_size=1))
+        with self.locator.checkout("db"):
+            with self.assertRaises(service_locator.queue.Empty):
+                with self.locator.checkout("db", block=False):
+                    pass
+            with self.assertRaises(service_locator.queue.Empty):
+                with self.locator.checkout("db", timeout=0.01):
+                    pass
+        self.assertEquals(2, self.locator.pool_stats("db")["timeouts"])
+
+    def test_blocking_checkout_waits_for_return(self):
+        self.locator.register("db", self.Connection, service_locator.Pooled(max_size=1))
+        checked_out = threading.Event()
+        returned = []
+
+        def hold():
+            with self.locator.checkout("db") as connection:
+                checked_out.set()
+                time.sleep(0.05)
+                returned.append(connection)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        checked_out.wait()
+        with self.locator.checkout("db", timeout=5) as connection:
+            self.assertTrue(connection is returned[0])
+        holder.join()
+        self.assertTrue(self.locator.pool_stats("db")["waits"] >= 1)
+
+    def test_evicts_idle_instances(self):
+        self.locator.register("db", self.Connection,
+                              service_locator.Pooled(min_size=1, max_size=2, idle_timeout=0.01))
+        with self.locator.checkout("db"):
+            with self.locator.checkout("db"):
+                pass
+        time.sleep(0.02)
+        with self.locator.checkout("db"):
+            pass
+        stats = self.locator.pool_stats("db")
+        self.assertEquals(1, stats["evicted"])
+        self.assertEquals(1, stats["size"])
+
+    def test_discards_invalid_instances(self):
+        spec = service_locator.Pooled(max_size=1, validate=lambda connection: connection.healthy)
+        self.locator.register("db", self.Connection, spec)
+        with self.locator.checkout("db") as connection:
+            connection.healthy = False
+        with self.locator.checkout("db") as replacement:
+            self.assertTrue(replacement is not connection)
+        self.assertEquals(1, self.locator.pool_stats("db")["invalidated"])
+
+    def test_requires_checkout(self):
+        self.locator.register("db", self.Connection, service_locator.POOLED)
+        with self.assertRaises(TypeError):
+            self.locator.instance("db")
+        self.locator.register("plain", self.Connection)
+        with self.assertRaises(TypeError):
+            self.locator.checkout("plain")
+
+
+class TestSeal(unittest.TestCase):
+
+    def test_refuses_registration_once_sealed(self):
+        locator = service_locator.ServiceLocator()
+        locator.register("foo", object())
+        locator.seal()
+        self.assertTrue(locator.sealed)
+        with self.assertRaises(RuntimeError):
+            locator.register("bar", object())
+        with self.assertRaises(TypeError):
+            locator._services["bar"] = object()
+
+    def test_refuses_registration_racing_seal(self):
+        locator = service_locator.ServiceLocator()
+        locator.register("foo", object())
+        errors = []
+
+        def register():
+            try:
+                locator.register("bar", object())
+            except RuntimeError as error:
+                errors.append(error)
+
+        with locator._lock:
+            registering = threading.Thread(target=register)
+            registering.start()
+            # let the registration reach the lock
+            time.sleep(0.05)
+            locator.seal()
+        registering.join()
+        self.assertEquals(1, len(errors))
+        self.assertFalse(locator.has_service("bar"))
+        with self.assertRaises(TypeError):
+            locator._services["bar"] = object()
+
+    def test_refuses_to_seal_with_unbound_services(self):
+        locator = service_locator.ServiceLocator()
+        locator.get_service_proxy("missing", "consumer")
+        with self.assertRaises(KeyError):
+            locator.seal()
+        self.assertFalse(locator.sealed)
+
+    def test_imports_and_collects_before_sealing(self):
+        locator = service_locator.ServiceLocator()
+        locator.register("lazy", "tests.lazy_service:LazyService")
+        locator.register("plugins", "tests.lazy_service:LazyService")
+        locator.register("plugins", object, multiple=True)
+        locator.seal()
+        self.assertFalse(locator._lazy)
+        self.assertTrue("plugins" in locator._collections)
+        self.assertEquals("LazyService", locator.service("lazy").__name__)
+        self.assertEquals(2, len(locator.collection("plugins")))
+        self.assertEquals((), locator.collection("unknown"))
+
+    def test_lookups_skip_the_lock(self):
+        class Foo(object):
+            def test(self):
+                return "success"
+
+        locator = service_locator.ServiceLocator()
+        locator.register(Foo, Foo())
+        proxy = locator.get_service_proxy(Foo, "consumer")
+        locator.seal()
+        acquired = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with service_locator.LockCM(locator._lock):
+                with locator._resolve_lock(Foo):
+                    acquired.set()
+                    release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        acquired.wait()
+        try:
+            self.assertTrue(locator.has_service(Foo))
+            self.assertTrue(isinstance(locator.service(Foo), Foo))
+            self.assertEquals("success", proxy.test())
+        finally:
+            release.set()
+            holder.join()
+
+    def test_remembers_hierarchy_of_bindings(self):
+        class Base(object):
+            pass
+
+        class Impl(Base):
+            pass
+
+        locator = service_locator.ServiceLocator(hierarchical_lookup=True)
+        locator.register(Impl, Impl)
+        locator.get_service_proxy(Base, "consumer")
+        locator.seal()
+        self.assertTrue(locator._lookup[Base] is Impl)
+
+
+class TestHotSwap(unittest.TestCase):
+
+    def setUp(self):
+        class Old(object):
+            def name(self):
+                return "old"
+
+        class New(object):
+            def name(self):
+                return "new"
+
+        self.Old = Old
+        self.New = New
+        self.locator = service_locator.ServiceLocator()
+
+    def test_proxy_resolves_swapped_service(self):
+        self.locator.register("svc", self.Old)
+        proxy = self.locator.get_service_proxy("svc", "consumer")()
+        self.assertEquals("old", proxy.name())
+        self.locator.register("svc", self.New)
+        self.assertEquals("new", proxy.name())
+
+    def test_swap_discards_cached_methods(self):
+        self.locator.register("svc", self.Old())
+        proxy = self.locator.get_service_proxy("svc", "consumer", cache_methods=True)
+        self.assertEquals("old", proxy.name())
+        self.assertTrue("name" in proxy.__dict__)
+        self.locator.register("svc", self.New())
+        self.assertFalse("name" in proxy.__dict__)
+        self.assertEquals("new", proxy.name())
+
+    def test_swap_replaces_lifetime(self):
+        self.locator.register("svc", self.Old, service_locator.THREAD_LOCAL)
+        proxy = self.locator.get_service_proxy("svc", "consumer")()
+        self.assertEquals("old", proxy.name())
+        self.locator.register("svc", self.New, service_locator.THREAD_LOCAL)
+        self.assertEquals("new", proxy.name())
+
+    def test_other_registrations_keep_service(self):
+        built = []
+
+        class Counted(object):
+            def __init__(self):
+                built.append(self)
+
+            def name(self):
+                return "counted"
+
+        self.locator.register("svc", Counted)
+        proxy = self.locator.get_service_proxy("svc", "consumer")()
+        proxy.name()
+        self.locator.register("other", self.New)
+        proxy.name()
+        self.assertEquals(1, len(built))
+        self.assertEquals(self.locator._generation, proxy._generation)
+
+    def test_hierarchy_resolved_proxy_survives_unrelated_registration(self):
+        built = []
+
+        class Base(object):
+            def name(self):
+                return "base"
+
+        class Impl(Base):
+            def __init__(self):
+                built.append(self)
+
+            def name(self):
+                return "impl"
+
+        locator = service_locator.ServiceLocator(hierarchical_lookup=True)
+        locator.register(Impl, Impl)
+        proxy = locator.get_service_proxy(Base, "consumer")()
+        self.assertEquals("impl", proxy.name())
+        locator.register("unrelated", self.New)
+        self.assertEquals("impl", proxy.name())
+        self.assertEquals(1, len(built))
+        # a registration the hierarchy now prefers does replace the service
+        locator.register(Base, Base)
+        self.assertEquals("base", proxy.name())
+
+
+class TestInject(unittest.TestCase):
+
+    def setUp(self):
+        self.locator = service_locator.ServiceLocator()
+
+    def test_passes_services_resolved_once(self):
+        lookups = []
+        locator = self.locator
+
+        @locator.inject(greeting="greeting")
+        def greet(name, greeting):
+            return "{} {}".format(greeting, name)
+
+        # registration may follow decoration
+        locator.register("greeting", "hello")
+        service = locator.service
+        locator.service = lambda key: lookups.append(key) or service(key)
+        self.assertEquals("hello bob", greet("bob"))
+        self.assertEquals("hello alice", greet("alice"))
+        self.assertEquals(["greeting"], lookups)
+        self.assertEquals("bye bob", greet("bob", greeting="bye"))
+
+    def test_injects_methods(self):
+        self.locator.register("greeting", "hello")
+
+        class Greeter(object):
+            @self.locator.inject(greeting="greeting")
+            def greet(self, name, greeting):
+                return "{} {}".format(greeting, name)
+
+        self.assertEquals("hello bob", Greeter().greet("bob"))
+
+    def test_reports_bindings(self):
+        @self.locator.inject(missing="missing")
+        def consumer(missing):
+            pass
+
+        unbound = self.locator.unbound_services()
+        self.assertEquals(["missing"], [binding.bind_key for binding in unbound])
+        self.assertEquals(__name__ + ".consumer", unbound[0].bindee)
+
+    def test_resolves_on_seal(self):
+        @self.locator.inject(greeting="greeting")
+        def greet(greeting):
+            return greeting
+
+        self.locator.register("greeting", "hello")
+        self.locator.seal()
+        self.assertEquals({"greeting": "hello"}, greet._injector.resolved)
+
+    def test_passes_swapped_services(self):
+        @self.locator.inject(greeting="greeting")
+        def greet(greeting):
+            return greeting
+
+        self.locator.register("greeting", "hello")
+        self.assertEquals("hello", greet())
+        self.locator.register("greeting", "howdy")
+        self.assertEquals("howdy", greet())
+
+    def test_resolves_once_under_concurrent_calls(self):
+        built = []
+
+        class Slow(object):
+            def __init__(self):
+                built.append(self)
+                time.sleep(0.05)
+
+        @self.locator.inject(slow="slow")
+        def use(slow):
+            return slow
+
+        self.locator.register("slow", Slow)
+        passed = []
+        threads = [threading.Thread(target=lambda: passed.append(use())) for _ in xrange(4)]
+        for calling in threads:
+            calling.start()
+        for calling in threads:
+            calling.join()
+        self.assertEquals(1, len(built))
+        self.assertEquals([built[0]] * 4, passed)
+
+    def test_instantiates_class_services(self):
+        class Logger(object):
+            pass
+
+        @self.locator.inject(logger=Logger)
+        def log(logger):
+            return logger
+
+        self.locator.register(Logger, Logger)
+        logger = log()
+        self.assertTrue(isinstance(logger, Logger))
+        self.assertTrue(log() is logger)
+
+    def test_honors_lifetimes(self):
+        class Request(object):
+            pass
+
+        @self.locator.inject(request=Request)
+        def handle(request):
+            return request
+
+        self.locator.register(Request, Request, service_locator.TRANSIENT)
+        first = handle()
+        self.assertTrue(isinstance(first, Request))
+        self.assertTrue(handle() is not first)
+
+
+class TestInjectDescriptor(unittest.TestCase):
+
+    def setUp(self):
+        class Service(object):
+            built = []
+
+            def __init__(self, name="default"):
+                self.name = name
+                self.built.append(self)
+
+        self.Service = Service
+        self.locator = service_locator.ServiceLocator()
+
+    def test_writes_resolved_service_through(self):
+        locator = self.locator
+
+        class Consumer(object):
+            service = service_locator.Inject("svc", args=("injected",), locator=locator)
+
+        locator.register("svc", self.Service)
+        self.assertEquals("injected", Consumer().service.name)
+        self.assertTrue(isinstance(vars(Consumer)["service"], self.Service))
+        self.assertTrue(Consumer.service is Consumer().service)
+        self.assertEquals(1, len(self.Service.built))
+
+    def test_binds_class(self):
+        locator = self.locator
+
+        class Consumer(object):
+            service = service_locator.Inject("missing", locator=locator)
+
+        unbound = locator.unbound_services()
+        self.assertEquals(__name__ + ".Consumer", unbound[0].bindee)
+
+    def test_resolves_through_subclass(self):
+        locator = self.locator
+
+        class Consumer(object):
+            service = service_locator.Inject("svc", locator=locator)
+
+        class SubConsumer(Consumer):
+            pass
+
+        locator.register("svc", self.Service)
+        self.assertTrue(SubConsumer.service is Consumer.service)
+        self.assertTrue("service" not in vars(SubConsumer))
+
+    def test_does_not_write_through_unshared_lifetime(self):
+        locator = self.locator
+
+        class Consumer(object):
+            service = service_locator.Inject("svc", locator=locator)
+
+        locator.register("svc", self.Service, service_locator.TRANSIENT)
+        self.assertTrue(Consumer.service is not Consumer.service)
+        self.assertTrue(isinstance(vars(Consumer)["service"], service_locator.Inject))
+
+
+class TestShared(unittest.TestCase):
+
+    def setUp(self):
+        class Logger(object):
+            built = []
+
+            def __init__(self, name, level="debug"):
+                self.name = name
+                self.level = level
+                self.built.append(name)
+
+        self.Logger = Logger
+        self.locator = service_locator.ServiceLocator()
+
+    def test_proxies_share_instances_by_arguments(self):
+        self.locator.register("logger", self.Logger, service_locator.SHARED)
+        first = self.locator.get_service_proxy("logger", "first")("app")
+        second = self.locator.get_service_proxy("logger", "second")("app")
+        other = self.locator.get_service_proxy("logger", "other")("app", level="info")
+        self.assertEquals("app", first.name)
+        self.assertEquals("app", second.name)
+        self.assertEquals("info", other.level)
+        self.assertTrue(first._service is second._service)
+        self.assertTrue(first._service is not other._service)
+        self.assertEquals(["app", "app"], self.Logger.built)
+
+    def test_weak_eviction(self):
+        self.locator.register("logger", self.Logger, service_locator.SHARED)
+        instance = self.locator.instance("logger", "app")
+        self.assertTrue(instance is self.locator.instance("logger", "app"))
+        del instance
+        self.locator.instance("logger", "app")
+        self.assertEquals(["app", "app"], self.Logger.built)
+
+    def test_lru_eviction(self):
+        self.locator.register("logger", self.Logger, service_locator.Shared(max_size=2))
+        for name in ("a", "b", "a", "c", "a", "b"):
+            self.locator.instance("logger", name)
+        # b was the least recently requested when c arrived
+        self.assertEquals(["a", "b", "c", "b"], self.Logger.built)
+
+    def test_refuses_weak_eviction_without_weak_references(self):
+        class Slotted(object):
+            __slots__ = ("name",)
+
+            def __init__(self, name):
+                self.name = name
+
+        with self.assertRaises(ValueError):
+            self.locator.register("slotted", Slotted, service_locator.SHARED)
+        self.assertFalse(self.locator.has_service("slotted"))
+        self.locator.register("slotted", Slotted, service_locator.Shared(max_size=4))
+        self.assertTrue(self.locator.instance("slotted", "a") is self.locator.instance("slotted", "a"))
+
+    def test_does_not_share_unhashable_arguments(self):
+        self.locator.register("logger", self.Logger, service_locator.SHARED)
+        first = self.locator.instance("logger", ["app"])
+        self.assertTrue(first is not self.locator.instance("logger", ["app"]))
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        locator = self.locator = service_locator.ServiceLocator()
+
+        class Database(object):
+            name = "database"
+
+        class Repository(object):
+            def __init__(self):
+                self.database = locator.get_service_proxy("database", "repository")()
+                self.database.name
+
+        self.locator.register("database", Database)
+        self.locator.register("repository", Repository)
+
+    def tearDown(self):
+        service_locator.disable_profiling()
+
+    def test_disabled_by_default(self):
+        self.assertTrue(service_locator.get_profiler() is None)
+
+    def test_records_nested_spans(self):
+        profiler = service_locator.enable_profiling()
+        proxy = self.locator.get_service_proxy("repository", "handler")()
+        proxy.database
+        Profiler = service_locator.Profiler
+        spans = [(span["kind"], span["key"], span["bindee"], span["depth"])
+                 for span in profiler.spans()]
+        self.assertEquals([
+            (Profiler.RESOLVE, "repository", "handler", 0),
+            (Profiler.INSTANTIATE, "repository", None, 1),
+            (Profiler.RESOLVE, "database", "repository", 2),
+            (Profiler.INSTANTIATE, "database", None, 3),
+        ], spans)
+        self.assertEquals(set([threading.current_thread().ident]),
+                          set(span["thread"] for span in profiler.spans()))
+
+    def test_chrome_trace(self):
+        profiler = service_locator.enable_profiling()
+        self.locator.get_service_proxy("repository", "handler")().database
+        events = profiler.chrome_trace()["traceEvents"]
+        self.assertEquals(4, len(events))
+        self.assertEquals(set(["X"]), set(event["ph"] for event in events))
+        self.assertEquals({"key": "repository", "bindee": "handler"}, events[0]["args"])
+        self.assertTrue(all(event["dur"] >= 0 for event in events))
+
+    def test_report_tree(self):
+        profiler = service_locator.enable_profiling()
+        self.locator.get_service_proxy("repository", "handler")().database
+        lines = profiler.report().splitlines()
+        self.assertEquals(4, len(lines))
+        self.assertTrue("resolve repository (handler)" in lines[0])
+        self.assertTrue("      instantiate database" in lines[3])
+        profiler.reset()
+        self.assertEquals("", profiler.report())
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_child_profiles_while_parent_holds_lock(self):
+        profiler = service_locator.enable_profiling()
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with profiler._lock:
+                held.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        held.wait()
+        try:
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    # a deadlocked child is killed rather than left hanging
+                    signal.alarm(5)
+                    service_locator.after_fork()
+                    self.locator.get_service_proxy("database", "handler")().name
+                    status = 0 if len(profiler.spans()) == 2 else 1
+                finally:
+                    os._exit(status)
+            _, status = os.waitpid(pid, 0)
+        finally:
+            release.set()
+            holder.join()
+        self.assertEquals(0, status)